@@ -4,13 +4,36 @@ import base64
 import numpy as np
 import cv2
 import mediapipe as mp
-from flask import Flask, request, jsonify
+import itertools
+import json
+import math
+import tempfile
+import threading
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
-from PIL import Image
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 import logging
-from ultralytics import YOLO
+
+from backends import DEFAULT_IOU_THRESHOLD, DEFAULT_MAX_DETECTIONS, ObjectOptions, create_object_backend
+from batch import iter_batch_inputs, stream_completed
+from batching import MicroBatcher
+from cache import ResultCache, image_cache_key
+from frames import IDENTITY_TRANSFORM, Frame
+from jobs import DEFAULT_JOB_PRIORITY, JOB_PRIORITIES, JobQueue
+from limits import RequestLimiter
+from config import env_int, env_float, env_bool, parse_bool
+from metrics import registry, stage_latency
+from motion import MotionGate
+from models import LazyModel
+from pool import DetectorPool, PoolExhausted
+from serializers import (
+    JSON_MIMETYPE, SCHEMA_HEADER, build_schema, encode, negotiate, schema_header, stream_mimetype
+)
+from sessions import SessionManager
+from shm_ring import DecodeRing
+from video import VideoReader, frame_stride_for, is_video_upload
 
 # Load environment variables
 load_dotenv()
@@ -19,10 +42,18 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging; per-frame details are only logged at DEBUG level
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
+# Realtime frames log a summary line once every this many frames (0 disables)
+REALTIME_LOG_EVERY = env_int('REALTIME_LOG_EVERY', 100)
+_realtime_frames = itertools.count()
+
+# In-flight requests and their latency, per endpoint
+_requests_in_flight = registry.gauge('http_requests_in_flight', 'Requests currently being handled')
+_request_latency = registry.histogram('http_request_duration_ms', 'Request handling time including streaming (ms)')
+
 # Initialize MediaPipe
 mp_face_detection = mp.solutions.face_detection
 mp_face_mesh = mp.solutions.face_mesh
@@ -30,71 +61,582 @@ mp_pose = mp.solutions.pose
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
 
+# detection_type values that enable each detector
+FACE_DETECTION_TYPES = ('face', 'both', 'all')
+BODY_DETECTION_TYPES = ('body', 'both', 'all')
+OBJECT_DETECTION_TYPES = ('object', 'objects', 'all')
+
+# Detector result keys, and the models each detector loads on first use
+DETECTOR_MODELS = {
+    'faces': ('face_detection', 'face_mesh', 'face_cascade'),
+    'bodyParts': ('pose', 'hands'),
+    'objects': ('objects',)
+}
+DETECTOR_ALIASES = {
+    'face': 'faces', 'faces': 'faces',
+    'body': 'bodyParts', 'bodyparts': 'bodyParts',
+    'object': 'objects', 'objects': 'objects'
+}
+
+def _parse_enabled_detectors(value):
+    """Detector keys from a comma separated allow-list such as 'face,object'"""
+    enabled = []
+    for name in value.split(','):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in DETECTOR_ALIASES:
+            logger.warning(f"Unknown detector {name!r} in ENABLED_DETECTORS")
+        elif DETECTOR_ALIASES[name] not in enabled:
+            enabled.append(DETECTOR_ALIASES[name])
+    return tuple(enabled)
+
+# Detectors this deployment serves; models of the others are never loaded
+ENABLED_DETECTORS = _parse_enabled_detectors(os.getenv('ENABLED_DETECTORS', 'face,body,object'))
+
+# Load the enabled models and run a dummy inference in the background at startup
+MODEL_WARMUP = env_bool('MODEL_WARMUP', False)
+
+# Detectors selected by one request can run side by side on this executor
+PARALLEL_DETECTORS = env_bool('PARALLEL_DETECTORS', True)
+detector_executor = ThreadPoolExecutor(
+    max_workers=env_int('DETECTOR_THREADS', 4), thread_name_prefix='detector'
+)
+
+# Inference engine for object detection: ultralytics (PyTorch), onnxruntime
+# or openvino, with the model file each one loads
+OBJECT_BACKEND = os.getenv('OBJECT_BACKEND', 'ultralytics')
+OBJECT_MODEL_PATH = os.getenv('OBJECT_MODEL_PATH') or None
+
+# Object model precision: int8 loads the quantized model made by tools/quantize.py
+OBJECT_PRECISION = os.getenv('OBJECT_PRECISION', 'fp32')
+
+# Object detection options, each overridable per request: minimum confidence,
+# NMS IoU threshold, maximum objects per image and an allow-list of class
+# names or ids (comma separated, empty keeps every class). They are applied
+# inside the model call, so suppressed boxes never reach Python.
+OBJECT_CONFIDENCE = env_float('OBJECT_CONFIDENCE', 0.5)
+OBJECT_IOU = env_float('OBJECT_IOU', DEFAULT_IOU_THRESHOLD)
+OBJECT_MAX_DETECTIONS = env_int('OBJECT_MAX_DETECTIONS', DEFAULT_MAX_DETECTIONS)
+OBJECT_CLASSES = os.getenv('OBJECT_CLASSES', '')
+
+# Pose model for still images: 0 (lite), 1 (full) or 2 (heavy)
+POSE_MODEL_COMPLEXITY = env_int('POSE_MODEL_COMPLEXITY', 2)
+
+# ROI cascade: when objects are detected together with faces or bodies,
+# YOLO runs first and the face and body models only see crops around the
+# people it found (each box grown by ROI_MARGIN of its size on every side)
+ROI_CASCADE = env_bool('ROI_CASCADE', False)
+ROI_MARGIN = env_float('ROI_MARGIN', 0.15)
+ROI_CLASS = 'person'
+
+# Longest image side each detector works on, per speed/accuracy tier (None
+# keeps the full resolution). The models resize internally anyway, and
+# results are mapped back to original image coordinates.
+RESOLUTION_TIERS = {
+    'fast': {'faces': 640, 'bodyParts': 480, 'objects': 640},
+    'balanced': {'faces': 1280, 'bodyParts': 960, 'objects': 640},
+    'accurate': {'faces': None, 'bodyParts': None, 'objects': None}
+}
+DEFAULT_RESOLUTION_TIER = os.getenv('RESOLUTION_TIER', 'balanced')
+if DEFAULT_RESOLUTION_TIER not in RESOLUTION_TIERS:
+    logger.warning(f"Unknown RESOLUTION_TIER {DEFAULT_RESOLUTION_TIER!r}, using 'balanced'")
+    DEFAULT_RESOLUTION_TIER = 'balanced'
+
+# Model settings that affect detection output; part of every result cache key
+RESULTS_CONFIG = {
+    'objectBackend': OBJECT_BACKEND,
+    'objectModel': OBJECT_MODEL_PATH,
+    'objectPrecision': OBJECT_PRECISION,
+    'poseComplexity': POSE_MODEL_COMPLEXITY,
+    'enabledDetectors': ENABLED_DETECTORS,
+    'minDetectionConfidence': 0.5,
+    'roiCascade': ROI_CASCADE,
+    'roiMargin': ROI_MARGIN
+}
+
+# Content types accepted as a raw encoded frame by /api/detect-realtime
+BINARY_FRAME_MIMETYPES = ('image/jpeg', 'image/png', 'image/webp', 'application/octet-stream')
+
+# Pose model used when landmarks are tracked across frames
+TRACKING_POSE_COMPLEXITY = env_int('TRACKING_POSE_COMPLEXITY', 1)
+
+# Motion gate for realtime sessions: frames where at most MOTION_THRESHOLD
+# of the pixels changed by more than MOTION_PIXEL_DELTA gray levels reuse
+# the previous results, and detection runs at least every
+# MOTION_KEYFRAME_INTERVAL frames. MOTION_TRACK_SHIFT also reuses results
+# of frames that only moved as a whole, shifted to match.
+MOTION_GATE = env_bool('MOTION_GATE', False)
+MOTION_THRESHOLD = env_float('MOTION_THRESHOLD', 0.01)
+MOTION_PIXEL_DELTA = env_int('MOTION_PIXEL_DELTA', 15)
+MOTION_KEYFRAME_INTERVAL = env_int('MOTION_KEYFRAME_INTERVAL', 30)
+MOTION_TRACK_SHIFT = env_bool('MOTION_TRACK_SHIFT', False)
+
+# Landmark name tables, indexed by MediaPipe landmark index
+POSE_LANDMARK_NAMES = (
+    'nose', 'left_eye_inner', 'left_eye', 'left_eye_outer',
+    'right_eye_inner', 'right_eye', 'right_eye_outer',
+    'left_ear', 'right_ear', 'mouth_left', 'mouth_right',
+    'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
+    'left_wrist', 'right_wrist', 'left_pinky', 'right_pinky',
+    'left_index', 'right_index', 'left_thumb', 'right_thumb',
+    'left_hip', 'right_hip', 'left_knee', 'right_knee',
+    'left_ankle', 'right_ankle', 'left_heel', 'right_heel',
+    'left_foot_index', 'right_foot_index'
+)
+HAND_LANDMARK_NAMES = (
+    'wrist', 'thumb_cmc', 'thumb_mcp', 'thumb_ip', 'thumb_tip',
+    'index_finger_mcp', 'index_finger_pip', 'index_finger_dip', 'index_finger_tip',
+    'middle_finger_mcp', 'middle_finger_pip', 'middle_finger_dip', 'middle_finger_tip',
+    'ring_finger_mcp', 'ring_finger_pip', 'ring_finger_dip', 'ring_finger_tip',
+    'pinky_mcp', 'pinky_pip', 'pinky_dip', 'pinky_tip'
+)
+
+# Key landmark indices for face mesh: eyes, nose, mouth corners
+FACE_KEY_LANDMARKS = np.array([1, 2, 5, 6, 9, 10, 151, 175, 199, 200])
+FACE_KEY_LANDMARK_NAMES = tuple(f'landmark_{i}' for i in FACE_KEY_LANDMARKS)
+
+# Face mesh indices used by the emotion geometry
+EMOTION_LANDMARKS = {
+    'mouth_left': 61, 'mouth_right': 291, 'mouth_top': 13, 'mouth_bottom': 14,
+    'left_eye_top': 159, 'left_eye_bottom': 145, 'right_eye_top': 386, 'right_eye_bottom': 374,
+    'left_eyebrow_inner': 70, 'right_eyebrow_inner': 300
+}
+EMOTION_LANDMARK_INDICES = np.array(list(EMOTION_LANDMARKS.values()))
+EMOTION_NAMES = ('happy', 'sad', 'angry', 'surprised', 'neutral', 'fear', 'disgust')
+
+# Field order and names of the compact response layout
+RESULT_SCHEMA = build_schema(POSE_LANDMARK_NAMES, HAND_LANDMARK_NAMES, FACE_KEY_LANDMARK_NAMES, EMOTION_NAMES)
+
+def _landmarks_to_array(landmarks, fields=('x', 'y', 'z')):
+    """Convert a MediaPipe landmark list into an (N, len(fields)) float32 array"""
+    return np.array(
+        [tuple(getattr(landmark, field) for field in fields) for landmark in landmarks.landmark],
+        dtype=np.float32
+    ).reshape(-1, len(fields))
+
+def _landmark_names(table, count):
+    """Names for the first count landmarks, falling back to landmark_<index>"""
+    return table[:count] + tuple(f'landmark_{i}' for i in range(len(table), count))
+
+def _keypoint_dicts(xy, confidences, names):
+    """Build keypoint dicts from integer pixel coordinates and confidences"""
+    return [
+        {'x': x, 'y': y, 'confidence': confidence, 'name': name}
+        for (x, y), confidence, name in zip(xy.tolist(), confidences, names)
+    ]
+
+def _points_bounding_box(xy):
+    """Bounding box of integer pixel points as a boundingBox dict"""
+    x_min, y_min = xy.min(axis=0).tolist()
+    x_max, y_max = xy.max(axis=0).tolist()
+    return {'x': x_min, 'y': y_min, 'width': x_max - x_min, 'height': y_max - y_min}
+
+# Minimum overlap for pairing a FaceMesh face with a detection box
+MESH_MATCH_MIN_IOU = 0.3
+
+def _box_iou(a, b):
+    """Intersection over union of two {x, y, width, height} boxes"""
+    ix = max(0, min(a['x'] + a['width'], b['x'] + b['width']) - max(a['x'], b['x']))
+    iy = max(0, min(a['y'] + a['height'], b['y'] + b['height']) - max(a['y'], b['y']))
+    intersection = ix * iy
+    union = a['width'] * a['height'] + b['width'] * b['height'] - intersection
+    return intersection / union if union > 0 else 0.0
+
+def _selected_detectors(detection_type):
+    """Enabled detector keys requested by detection_type"""
+    return [
+        key for key, types in (
+            ('faces', FACE_DETECTION_TYPES),
+            ('bodyParts', BODY_DETECTION_TYPES),
+            ('objects', OBJECT_DETECTION_TYPES)
+        ) if detection_type in types and key in ENABLED_DETECTORS
+    ]
+
+def _decode_max_side(detection_type, tier):
+    """Smallest decode size that still serves every selected detector"""
+    max_sides = RESOLUTION_TIERS[tier]
+    selected = [max_sides[key] for key in _selected_detectors(detection_type)]
+    if not selected or None in selected:
+        return None
+    return max(selected)
+
+def _person_rois(objects, size, margin=ROI_MARGIN):
+    """Regions around detected people as (x1, y1, x2, y2) boxes
+
+    Boxes are grown by margin, clipped to the image and merged while they
+    overlap, so a face or hand is never cut in half or found twice.
+    """
+    width, height = size
+    rois = []
+    for obj in objects:
+        if obj['name'] != ROI_CLASS:
+            continue
+        box = obj['boundingBox']
+        dx, dy = box['width'] * margin, box['height'] * margin
+        rois.append((
+            max(box['x'] - dx, 0), max(box['y'] - dy, 0),
+            min(box['x'] + box['width'] + dx, width), min(box['y'] + box['height'] + dy, height)
+        ))
+
+    merged = True
+    while merged:
+        merged = False
+        for i, j in itertools.combinations(range(len(rois)), 2):
+            a, b = rois[i], rois[j]
+            if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                rois[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                del rois[j]
+                merged = True
+                break
+    return [roi for roi in rois if roi[2] > roi[0] and roi[3] > roi[1]]
+
+def _detect_in_crops(detect, crops):
+    """Run a detector on each crop's arguments and concatenate the results"""
+    results = []
+    for args in crops:
+        results.extend(detect(*args))
+    return results
+
+def _class_ids(names):
+    """Sorted ids of YOLO classes given by lowercase name or id
+
+    Models exported without class names only accept ids.
+    """
+    model = _primary_service.yolo_model
+    if model is None:
+        return None
+    ids = {name.lower(): class_id for class_id, name in model.names.items()}
+    classes = set()
+    for item in names:
+        if item.isdigit() and (not model.names or int(item) in model.names):
+            classes.add(int(item))
+        elif item in ids:
+            classes.add(ids[item])
+        else:
+            raise ValueError(f"Unknown object class: {item}")
+    return tuple(sorted(classes)) or None
+
+def _object_options(values, detection_type='objects'):
+    """Object detection options of a request, defaulting to the OBJECT_* settings
+
+    Class names are only resolved, which loads the object model, when
+    detection_type includes objects. Raises ValueError for malformed or
+    out of range values and unknown classes.
+    """
+    def number(key, default, integer=False):
+        value = values.get(key)
+        if value is None or value == '':
+            return default
+        try:
+            if isinstance(value, bool):
+                raise ValueError(key)
+            parsed = float(value)
+            if integer:
+                if not parsed.is_integer():
+                    raise ValueError(key)
+                parsed = int(parsed)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"Invalid {key}: {value!r}")
+        return parsed
+
+    confidence = number('confidence', OBJECT_CONFIDENCE)
+    iou = number('iou', OBJECT_IOU)
+    max_detections = number('max_detections', OBJECT_MAX_DETECTIONS, integer=True)
+    if not 0 <= confidence <= 1 or not 0 <= iou <= 1:
+        raise ValueError("confidence and iou must be between 0 and 1")
+    if max_detections < 1:
+        raise ValueError("max_detections must be at least 1")
+
+    if hasattr(values, 'getlist'):
+        # Form and query values may repeat the key: classes=person&classes=car
+        classes = ','.join(values.getlist('classes'))
+    else:
+        classes = values.get('classes')
+    if classes is None or classes == '':
+        classes = OBJECT_CLASSES
+    if isinstance(classes, str):
+        classes = classes.split(',')
+    elif not isinstance(classes, list) or any(
+        isinstance(item, bool) or not isinstance(item, (str, int)) for item in classes
+    ):
+        raise ValueError("classes must be class names or ids, as a list or a comma-separated string")
+    classes = [str(item).strip().lower() for item in classes if str(item).strip()]
+    resolve = classes and 'objects' in _selected_detectors(detection_type)
+    return ObjectOptions(confidence, iou, max_detections, _class_ids(classes) if resolve else None)
+
+def _timed(func, *args):
+    """Call func and return its result with the elapsed time in ms"""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, round((time.perf_counter() - started) * 1000, 1)
+
 class AIDetectionService:
-    def __init__(self):
-        self.face_detection = mp_face_detection.FaceDetection(
+    def __init__(self, shared=None, tracking=False, precision=None):
+        # In tracking mode (video and streams) MediaPipe follows landmarks
+        # from the previous frame instead of re-running detection each frame
+        self.tracking = tracking
+        # fp32 or int8 object model, per deployment unless given explicitly
+        self.precision = shared.precision if shared is not None else precision or OBJECT_PRECISION
+
+        # Models are built on first use, and only for enabled detectors
+        enabled_models = {name for key in ENABLED_DETECTORS for name in DETECTOR_MODELS[key]}
+        self._models = {
+            name: LazyModel(name, loader, enabled=name in enabled_models)
+            for name, loader in (
+                ('face_detection', self._load_face_detection),
+                ('face_mesh', self._load_face_mesh),
+                ('face_cascade', self._load_face_cascade),
+                ('pose', self._load_pose),
+                ('hands', self._load_hands)
+            )
+        }
+
+        # YOLO is only ever called from its batcher thread, so pooled
+        # instances reuse the model and batcher of the first instance
+        if shared is not None:
+            self._models['objects'] = shared._models['objects']
+            self.yolo_batcher = shared.yolo_batcher
+            return
+
+        self._models['objects'] = LazyModel(
+            'objects', self._load_object_model, enabled='objects' in ENABLED_DETECTORS
+        )
+
+        # Same-sized frames from concurrent requests are grouped into one YOLO forward pass
+        self.yolo_batcher = None
+        if self._models['objects'].enabled:
+            self.yolo_batcher = MicroBatcher(
+                self._run_yolo_batch,
+                max_batch_size=env_int('YOLO_MAX_BATCH_SIZE', 8),
+                max_wait_ms=env_float('YOLO_BATCH_WAIT_MS', 5.0),
+                name='yolo'
+            )
+
+    def _load_face_detection(self):
+        return mp_face_detection.FaceDetection(
             model_selection=0, min_detection_confidence=0.5
         )
-        self.face_mesh = mp_face_mesh.FaceMesh(
-            static_image_mode=True,
+
+    def _load_face_mesh(self):
+        return mp_face_mesh.FaceMesh(
+            static_image_mode=not self.tracking,
             max_num_faces=10,
             refine_landmarks=True,
             min_detection_confidence=0.5
         )
-        self.pose = mp_pose.Pose(
-            static_image_mode=True,
-            model_complexity=2,
+
+    def _load_face_cascade(self):
+        # Face cascade for backup detection
+        return cv2.CascadeClassifier(
+            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        )
+
+    def _load_pose(self):
+        return mp_pose.Pose(
+            static_image_mode=not self.tracking,
+            model_complexity=TRACKING_POSE_COMPLEXITY if self.tracking else POSE_MODEL_COMPLEXITY,
             enable_segmentation=True,
             min_detection_confidence=0.5
         )
-        self.hands = mp_hands.Hands(
-            static_image_mode=True,
+
+    def _load_hands(self):
+        return mp_hands.Hands(
+            static_image_mode=not self.tracking,
             max_num_hands=2,
             min_detection_confidence=0.5
         )
-        
-        # Initialize face cascade for backup detection
-        try:
-            self.face_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
-        except Exception as e:
-            logger.warning(f"Could not load Haar cascade: {e}")
-            self.face_cascade = None
 
-        # Initialize YOLO model for object detection
-        try:
-            logger.info("🔄 Loading YOLO model for object detection...")
-            self.yolo_model = YOLO('yolov8n.pt')  # Load YOLOv8 nano model
-            logger.info("✅ YOLO model loaded successfully!")
-        except Exception as e:
-            logger.error(f"❌ Failed to load YOLO model: {e}")
-            self.yolo_model = None
+    def _load_object_model(self):
+        logger.info(f"🔄 Loading YOLO model for object detection ({OBJECT_BACKEND} backend, {self.precision})...")
+        return create_object_backend(
+            OBJECT_BACKEND, OBJECT_MODEL_PATH,
+            threads=env_int('OBJECT_BACKEND_THREADS', 0),
+            precision=self.precision
+        )
+
+    @property
+    def face_detection(self):
+        return self._models['face_detection'].get()
+
+    @property
+    def face_mesh(self):
+        return self._models['face_mesh'].get()
+
+    @property
+    def face_cascade(self):
+        return self._models['face_cascade'].get()
+
+    @property
+    def pose(self):
+        return self._models['pose'].get()
+
+    @property
+    def hands(self):
+        return self._models['hands'].get()
+
+    @property
+    def yolo_model(self):
+        return self._models['objects'].get()
+
+    def load_models(self):
+        """Load every enabled model now instead of on first use"""
+        for model in self._models.values():
+            model.get()
+
+    def model_status(self):
+        """Load state of each model, keyed by model name"""
+        return {name: model.status() for name, model in self._models.items()}
+
+    def close(self):
+        """Release the MediaPipe graphs owned by this instance"""
+        for name in ('face_detection', 'face_mesh', 'pose', 'hands'):
+            graph = self._models[name].peek()
+            if graph is not None:
+                graph.close()
 
     def preprocess_image(self, image_data):
         """Preprocess image for detection"""
         try:
-            # Convert base64 to image if needed
+            # Base64 data URLs from JSON requests are turned into raw bytes
             if isinstance(image_data, str):
                 if image_data.startswith('data:image'):
-                    image_data = image_data.split(',')[1]
-                image_bytes = base64.b64decode(image_data)
-                image = Image.open(BytesIO(image_bytes))
-                image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+                    image_data = image_data.split(',', 1)[1]
+                image_data = base64.b64decode(image_data)
+
+            # Decode straight from the encoded buffer without extra copies
+            if isinstance(image_data, (bytes, bytearray, memoryview)):
+                with stage_latency.timer(stage='decode'):
+                    image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+                if image is None:
+                    raise ValueError("Could not decode image")
             else:
                 image = image_data
 
             # Convert to RGB for MediaPipe
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            with stage_latency.timer(stage='color_conversion'):
+                rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
             return image, rgb_image
         except Exception as e:
             logger.error(f"Image preprocessing error: {e}")
             raise ValueError("Invalid image data")
 
-    def detect_faces(self, rgb_image, bgr_image):
+    def _cascade_person(self, selected):
+        """Class id the ROI cascade crops around, or None when faces and bodies search the whole frame"""
+        # Tracking graphs follow one stream of whole frames, so crops would break tracking
+        if not (
+            ROI_CASCADE and not self.tracking and 'objects' in selected and len(selected) > 1
+            and self.yolo_model is not None
+        ):
+            return None
+        # Without a person class (e.g. an export without names) there is nothing
+        # to crop to, so faces and bodies are searched on the whole frame
+        return next((class_id for class_id, name in self.yolo_model.names.items() if name == ROI_CLASS), None)
+
+    def detect_frame_objects(self, frame, detection_type, tier=None, object_options=None):
+        """Detect objects the way run_detection would, returning (objects, ms) for its objects argument
+
+        YOLO only runs on the shared batcher thread, so this needs no pooled
+        detector and concurrent callers share batched forward passes.
+        """
+        if object_options is None:
+            object_options = _object_options({})
+        # People are detected even when the class allow-list leaves them out of the results
+        person = self._cascade_person(_selected_detectors(detection_type))
+        classes = object_options.classes
+        if person is not None and classes is not None and person not in classes:
+            object_options = object_options._replace(classes=tuple(sorted(classes + (person,))))
+        view = frame.view(RESOLUTION_TIERS[tier or DEFAULT_RESOLUTION_TIER]['objects'])
+        return _timed(self.detect_objects, view.bgr, view.transform, object_options)
+
+    def run_detection(self, frame, detection_type, parallel=None, tier=None, object_options=None, objects=None):
+        """Run the detectors selected by detection_type and merge their results
+
+        Face, body and object detectors use separate models, so in parallel
+        mode they run concurrently and latency approaches the slowest one.
+        Each detector sees the frame downscaled to its resolution for the
+        tier, and reports coordinates in the original image. Objects are
+        detected with object_options, by default the OBJECT_* settings,
+        unless objects already holds detect_frame_objects' result for this
+        frame and these settings.
+
+        In ROI cascade mode objects are detected first, and the face and
+        body detectors then run on crops around each person only, or not
+        at all when there is nobody in the frame.
+        """
+        if parallel is None:
+            parallel = PARALLEL_DETECTORS
+        max_sides = RESOLUTION_TIERS[tier or DEFAULT_RESOLUTION_TIER]
+        results = {'faces': [], 'bodyParts': [], 'objects': [], 'timings': {}}
+
+        selected = _selected_detectors(detection_type)
+        if 'objects' in selected and object_options is None:
+            object_options = _object_options({})
+        person = self._cascade_person(selected)
+        rois = None
+        if person is not None:
+            if objects is None:
+                objects = self.detect_frame_objects(frame, detection_type, tier, object_options)
+            found, results['timings']['objects'] = objects
+            rois = _person_rois(found, frame.original_size)
+            classes = object_options.classes
+            results['objects'] = found if classes is None or person in classes else [
+                obj for obj in found if obj['class_id'] in classes
+            ]
+            selected = [key for key in selected if key != 'objects'] if rois else []
+
+        # Views are built here so detector threads only read shared arrays
+        tasks = []
+        if 'faces' in selected:
+            view = frame.view(max_sides['faces'])
+            if rois:
+                crops = [crop for crop in (view.crop(roi) for roi in rois) if crop.bgr.size]
+                tasks.append(('faces', _detect_in_crops, (
+                    self.detect_faces, [(crop.rgb, crop.bgr, crop.transform) for crop in crops]
+                )))
+            else:
+                tasks.append(('faces', self.detect_faces, (view.rgb, view.bgr, view.transform)))
+        if 'bodyParts' in selected:
+            view = frame.view(max_sides['bodyParts'])
+            if rois:
+                crops = [crop for crop in (view.crop(roi) for roi in rois) if crop.bgr.size]
+                tasks.append(('bodyParts', _detect_in_crops, (
+                    self.detect_body_parts, [(crop.rgb, crop.transform) for crop in crops]
+                )))
+            else:
+                tasks.append(('bodyParts', self.detect_body_parts, (view.rgb, view.transform)))
+        if 'objects' in selected and objects is not None:
+            results['objects'], results['timings']['objects'] = objects
+        elif 'objects' in selected:
+            view = frame.view(max_sides['objects'])
+            tasks.append(('objects', self.detect_objects, (view.bgr, view.transform, object_options)))
+
+        if rois is not None:
+            results['rois'] = len(rois)
+
+        if parallel and len(tasks) > 1:
+            # The request thread runs the first detector itself
+            futures = [
+                (key, detector_executor.submit(_timed, func, *args))
+                for key, func, args in tasks[1:]
+            ]
+            key, func, args = tasks[0]
+            results[key], results['timings'][key] = _timed(func, *args)
+            for key, future in futures:
+                results[key], results['timings'][key] = future.result()
+        else:
+            for key, func, args in tasks:
+                results[key], results['timings'][key] = _timed(func, *args)
+
+        for key, elapsed in results['timings'].items():
+            stage_latency.observe(elapsed, stage=key)
+        return results
+
+    def detect_faces(self, rgb_image, bgr_image, transform=IDENTITY_TRANSFORM):
         """Detect faces using MediaPipe and OpenCV"""
         faces = []
         height, width = rgb_image.shape[:2]
+        fx, fy, ox, oy = transform
 
         try:
             # MediaPipe face detection
@@ -106,16 +648,16 @@ class AIDetectionService:
                     confidence = detection.score[0]
                     
                     # Convert relative coordinates to absolute
-                    x = int(bbox.xmin * width)
-                    y = int(bbox.ymin * height)
-                    w = int(bbox.width * width)
-                    h = int(bbox.height * height)
+                    x = int(bbox.xmin * width * fx + ox)
+                    y = int(bbox.ymin * height * fy + oy)
+                    w = int(bbox.width * width * fx)
+                    h = int(bbox.height * height * fy)
                     
                     faces.append({
                         'boundingBox': {'x': x, 'y': y, 'width': w, 'height': h},
                         'confidence': float(confidence),
                         'landmarks': [],
-                        'emotions': self._analyze_emotions(bgr_image[y:y+h, x:x+w]),
+                        'emotions': self._get_default_emotions(),
                         'age': None,
                         'gender': None
                     })
@@ -129,95 +671,74 @@ class AIDetectionService:
                 
                 for (x, y, w, h) in cv_faces:
                     faces.append({
-                        'boundingBox': {'x': int(x), 'y': int(y), 'width': int(w), 'height': int(h)},
+                        'boundingBox': {
+                            'x': int(x * fx + ox),
+                            'y': int(y * fy + oy),
+                            'width': int(w * fx),
+                            'height': int(h * fy)
+                        },
                         'confidence': 0.8,  # Default confidence for Haar cascade
                         'landmarks': [],
-                        'emotions': self._analyze_emotions(bgr_image[y:y+h, x:x+w]),
+                        'emotions': self._get_default_emotions(),
                         'age': None,
                         'gender': None
                     })
 
-            # Get face landmarks
+            # Get face landmarks and emotions from a single mesh pass
             if faces:
-                mesh_results = self.face_mesh.process(rgb_image)
-                if mesh_results.multi_face_landmarks:
-                    for i, landmarks in enumerate(mesh_results.multi_face_landmarks):
-                        if i < len(faces):
-                            faces[i]['landmarks'] = self._extract_key_landmarks(landmarks, width, height)
+                self._attach_face_mesh(faces, rgb_image, transform)
 
         except Exception as e:
             logger.error(f"Face detection error: {e}")
 
         return faces
 
-    def detect_body_parts(self, rgb_image):
+    def detect_body_parts(self, rgb_image, transform=IDENTITY_TRANSFORM):
         """Detect body parts using MediaPipe Pose and Hands"""
         body_parts = []
         height, width = rgb_image.shape[:2]
+        fx, fy, ox, oy = transform
+        scale = np.array([width * fx, height * fy], dtype=np.float64)
+        offset = np.array([ox, oy], dtype=np.float64)
 
         try:
             # Pose detection
             pose_results = self.pose.process(rgb_image)
             if pose_results.pose_landmarks:
-                keypoints = []
-                for i, landmark in enumerate(pose_results.pose_landmarks.landmark):
-                    keypoints.append({
-                        'x': int(landmark.x * width),
-                        'y': int(landmark.y * height),
-                        'confidence': float(landmark.visibility),
-                        'name': self._get_pose_landmark_name(i)
-                    })
+                points = _landmarks_to_array(pose_results.pose_landmarks, ('x', 'y', 'visibility'))
+                xy = (points[:, :2] * scale + offset).astype(np.int64)
+                visibility = points[:, 2]
+                keypoints = _keypoint_dicts(
+                    xy, visibility.tolist(), _landmark_names(POSE_LANDMARK_NAMES, len(points))
+                )
                 
                 # Calculate bounding box for pose
-                valid_points = [kp for kp in keypoints if kp['confidence'] > 0.5]
-                if valid_points:
-                    xs = [kp['x'] for kp in valid_points]
-                    ys = [kp['y'] for kp in valid_points]
-                    x_min, x_max = min(xs), max(xs)
-                    y_min, y_max = min(ys), max(ys)
-                    
+                valid = visibility > 0.5
+                if valid.any():
                     body_parts.append({
                         'name': 'full_body_pose',
                         'keypoints': keypoints,
-                        'boundingBox': {
-                            'x': x_min,
-                            'y': y_min,
-                            'width': x_max - x_min,
-                            'height': y_max - y_min
-                        },
-                        'confidence': float(np.mean([kp['confidence'] for kp in valid_points]))
+                        'boundingBox': _points_bounding_box(xy[valid]),
+                        'confidence': float(visibility[valid].astype(np.float64).mean())
                     })
 
             # Hand detection
             hand_results = self.hands.process(rgb_image)
             if hand_results.multi_hand_landmarks:
                 for i, hand_landmarks in enumerate(hand_results.multi_hand_landmarks):
-                    keypoints = []
-                    for j, landmark in enumerate(hand_landmarks.landmark):
-                        keypoints.append({
-                            'x': int(landmark.x * width),
-                            'y': int(landmark.y * height),
-                            'confidence': 1.0,  # MediaPipe hands doesn't provide confidence per landmark
-                            'name': self._get_hand_landmark_name(j)
-                        })
-                    
-                    # Calculate bounding box for hand
-                    xs = [kp['x'] for kp in keypoints]
-                    ys = [kp['y'] for kp in keypoints]
-                    x_min, x_max = min(xs), max(xs)
-                    y_min, y_max = min(ys), max(ys)
+                    points = _landmarks_to_array(hand_landmarks, ('x', 'y'))
+                    xy = (points * scale + offset).astype(np.int64)
+                    # MediaPipe hands doesn't provide confidence per landmark
+                    keypoints = _keypoint_dicts(
+                        xy, [1.0] * len(points), _landmark_names(HAND_LANDMARK_NAMES, len(points))
+                    )
                     
                     hand_label = hand_results.multi_handedness[i].classification[0].label
                     
                     body_parts.append({
                         'name': f'{hand_label.lower()}_hand',
                         'keypoints': keypoints,
-                        'boundingBox': {
-                            'x': x_min,
-                            'y': y_min,
-                            'width': x_max - x_min,
-                            'height': y_max - y_min
-                        },
+                        'boundingBox': _points_bounding_box(xy),
                         'confidence': 0.9
                     })
 
@@ -226,7 +747,7 @@ class AIDetectionService:
 
         return body_parts
 
-    def detect_objects(self, bgr_image):
+    def detect_objects(self, bgr_image, transform=IDENTITY_TRANSFORM, options=None):
         """Detect objects using YOLO model"""
         objects = []
         
@@ -235,64 +756,132 @@ class AIDetectionService:
             return objects
 
         try:
-            # Run YOLO detection
-            results = self.yolo_model(bgr_image, verbose=False)
-            
-            # Process results
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        # Get bounding box coordinates
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        confidence = box.conf[0].cpu().numpy()
-                        class_id = int(box.cls[0].cpu().numpy())
-                        
-                        # Get class name
-                        class_name = self.yolo_model.names[class_id]
-                        
-                        # Only include objects with confidence > 0.5
-                        if confidence > 0.5:
-                            objects.append({
-                                'name': class_name,
-                                'confidence': float(confidence),
-                                'boundingBox': {
-                                    'x': int(x1),
-                                    'y': int(y1),
-                                    'width': int(x2 - x1),
-                                    'height': int(y2 - y1)
-                                },
-                                'class_id': class_id
-                            })
-            
-            logger.info(f"🎯 Detected {len(objects)} objects")
+            # Run YOLO detection, batched with concurrent frames of the same
+            # size and options: mixed sizes would be letterboxed to a shared
+            # input size and detect differently than on their own
+            key = (options or _object_options({}), bgr_image.shape)
+            result = self.yolo_batcher.submit(bgr_image, key=key)
+            with stage_latency.timer(stage='objects_postprocess'):
+                objects = self._parse_yolo_result(result, transform)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🎯 Detected {len(objects)} objects")
             
         except Exception as e:
             logger.error(f"Object detection error: {e}")
 
         return objects
 
-    def _analyze_emotions(self, face_roi):
-        """Analyze emotions from face ROI using facial landmarks"""
+    def _run_yolo_batch(self, images, key):
+        """Run one YOLO forward pass over a list of same-sized BGR frames"""
+        options, _ = key
+        return self.yolo_model.predict(images, options)
+
+    def _parse_yolo_result(self, detections, transform=IDENTITY_TRANSFORM):
+        """Convert the detections of a single image into detected objects"""
+        names = self.yolo_model.names
+        fx, fy, ox, oy = transform
+        # Boxes in the original image, converted for all detections at once
+        xyxy = detections.xyxy * (fx, fy, fx, fy) + (ox, oy, ox, oy)
+        corners = xyxy[:, :2].astype(np.int64).tolist()
+        sizes = (xyxy[:, 2:] - xyxy[:, :2]).astype(np.int64).tolist()
+        return [
+            {
+                'name': names.get(class_id, str(class_id)),
+                'confidence': confidence,
+                'boundingBox': {'x': x, 'y': y, 'width': width, 'height': height},
+                'class_id': class_id
+            }
+            for (x, y), (width, height), confidence, class_id in zip(
+                corners, sizes, detections.conf.tolist(), detections.cls.tolist()
+            )
+        ]
+
+    def _attach_face_mesh(self, faces, rgb_image, transform=IDENTITY_TRANSFORM):
+        """Fill landmarks and emotions of detected faces from one FaceMesh pass
+
+        Mesh faces are paired with detection boxes by IoU, since FaceMesh
+        does not return faces in the same order as the face detector.
+        """
+        height, width = rgb_image.shape[:2]
+        fx, fy, ox, oy = transform
+        # Landmarks are projected onto the original image, so the emotion
+        # geometry keeps measuring original-resolution pixels
+        scaled_width, scaled_height = width * fx, height * fy
+        mesh_faces = []
+        mesh_results = self.face_mesh.process(rgb_image)
+        if mesh_results.multi_face_landmarks:
+            mesh_faces = [_landmarks_to_array(landmarks) for landmarks in mesh_results.multi_face_landmarks]
+
+        # Greedily pair each mesh face with its best-overlapping detection box
+        candidates = []
+        for mesh_index, points in enumerate(mesh_faces):
+            mesh_box = self._landmarks_bounding_box(points, scaled_width, scaled_height, offset=(ox, oy))
+            for face_index, face in enumerate(faces):
+                iou = _box_iou(mesh_box, face['boundingBox'])
+                if iou >= MESH_MATCH_MIN_IOU:
+                    candidates.append((iou, face_index, mesh_index))
+
+        matched_faces, matched_meshes = set(), set()
+        for iou, face_index, mesh_index in sorted(candidates, reverse=True):
+            if face_index in matched_faces or mesh_index in matched_meshes:
+                continue
+            matched_faces.add(face_index)
+            matched_meshes.add(mesh_index)
+            points = mesh_faces[mesh_index]
+            faces[face_index]['landmarks'] = self._extract_key_landmarks(
+                points, scaled_width, scaled_height, offset=(ox, oy)
+            )
+            faces[face_index]['emotions'] = self._calculate_emotions_from_landmarks(
+                points, (scaled_height, scaled_width)
+            )
+
+        # The full-frame mesh can miss small faces in wide images; only those
+        # faces get a mesh pass on their own crop. A tracking graph would
+        # follow the crop into the next frame, so there they keep defaults.
+        for face_index, face in enumerate(faces):
+            if face_index in matched_faces:
+                continue
+            if self.tracking:
+                face['emotions'] = self._get_default_emotions()
+            else:
+                self._analyze_face_crop(face, rgb_image, transform)
+
+    def _analyze_face_crop(self, face, rgb_image, transform=IDENTITY_TRANSFORM):
+        """Fill landmarks and emotions of one face from a mesh pass on its crop"""
+        face['emotions'] = self._get_default_emotions()
         try:
-            if face_roi is None or face_roi.size == 0:
-                return self._get_default_emotions()
-            
-            # Convert face ROI to RGB for MediaPipe
-            rgb_face = cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB)
-            
-            # Get face mesh landmarks for this face
-            mesh_results = self.face_mesh.process(rgb_face)
-            
+            # The face box is in original coordinates, the crop in frame pixels
+            fx, fy, ox, oy = transform
+            box = face['boundingBox']
+            x = max(int((box['x'] - ox) / fx), 0)
+            y = max(int((box['y'] - oy) / fy), 0)
+            x_end = int((box['x'] + box['width'] - ox) / fx)
+            y_end = int((box['y'] + box['height'] - oy) / fy)
+            face_roi = rgb_image[y:y_end, x:x_end]
+            if face_roi.size == 0:
+                return
+
+            mesh_results = self.face_mesh.process(np.ascontiguousarray(face_roi))
             if mesh_results.multi_face_landmarks:
-                landmarks = mesh_results.multi_face_landmarks[0]
-                return self._calculate_emotions_from_landmarks(landmarks, rgb_face.shape)
-            else:
-                return self._get_default_emotions()
+                points = _landmarks_to_array(mesh_results.multi_face_landmarks[0])
+                roi_height, roi_width = face_roi.shape[:2]
+                face['landmarks'] = self._extract_key_landmarks(
+                    points, roi_width * fx, roi_height * fy, offset=(int(x * fx + ox), int(y * fy + oy))
+                )
+                face['emotions'] = self._calculate_emotions_from_landmarks(
+                    points, (roi_height * fy, roi_width * fx)
+                )
                 
         except Exception as e:
             logger.warning(f"Emotion analysis error: {e}")
-            return self._get_default_emotions()
+
+    def _landmarks_bounding_box(self, points, width, height, offset=(0, 0)):
+        """Pixel bounding box enclosing all landmarks of one face"""
+        xy = points[:, :2] * np.array([width, height], dtype=np.float64) + np.array(offset, dtype=np.float64)
+        x_min, y_min = xy.min(axis=0).tolist()
+        x_max, y_max = xy.max(axis=0).tolist()
+        return {'x': x_min, 'y': y_min, 'width': x_max - x_min, 'height': y_max - y_min}
     
     def _get_default_emotions(self):
         """Return default neutral emotion state"""
@@ -306,30 +895,13 @@ class AIDetectionService:
             'disgust': 0.05
         }
     
-    def _calculate_emotions_from_landmarks(self, landmarks, image_shape):
+    def _calculate_emotions_from_landmarks(self, mesh_points, image_shape):
         """Calculate emotions based on facial landmark geometry"""
         height, width = image_shape[:2]
         
-        # Extract key points for emotion detection
-        points = {}
-        
-        # Mouth corners and center
-        points['mouth_left'] = [landmarks.landmark[61].x * width, landmarks.landmark[61].y * height]
-        points['mouth_right'] = [landmarks.landmark[291].x * width, landmarks.landmark[291].y * height]
-        points['mouth_top'] = [landmarks.landmark[13].x * width, landmarks.landmark[13].y * height]
-        points['mouth_bottom'] = [landmarks.landmark[14].x * width, landmarks.landmark[14].y * height]
-        
-        # Eyes
-        points['left_eye_top'] = [landmarks.landmark[159].x * width, landmarks.landmark[159].y * height]
-        points['left_eye_bottom'] = [landmarks.landmark[145].x * width, landmarks.landmark[145].y * height]
-        points['right_eye_top'] = [landmarks.landmark[386].x * width, landmarks.landmark[386].y * height]
-        points['right_eye_bottom'] = [landmarks.landmark[374].x * width, landmarks.landmark[374].y * height]
-        
-        # Eyebrows
-        points['left_eyebrow_inner'] = [landmarks.landmark[70].x * width, landmarks.landmark[70].y * height]
-        points['left_eyebrow_outer'] = [landmarks.landmark[107].x * width, landmarks.landmark[107].y * height]
-        points['right_eyebrow_inner'] = [landmarks.landmark[300].x * width, landmarks.landmark[300].y * height]
-        points['right_eyebrow_outer'] = [landmarks.landmark[336].x * width, landmarks.landmark[336].y * height]
+        # Extract key points for emotion detection, scaled to pixels in one step
+        xy = mesh_points[EMOTION_LANDMARK_INDICES, :2] * np.array([width, height], dtype=np.float64)
+        points = dict(zip(EMOTION_LANDMARKS, xy.tolist()))
         
         # Calculate features
         emotions = self._get_default_emotions()
@@ -377,61 +949,308 @@ class AIDetectionService:
         
         return emotions
 
-    def _extract_key_landmarks(self, landmarks, width, height):
+    def _extract_key_landmarks(self, points, width, height, offset=(0, 0)):
         """Extract key facial landmarks"""
-        # Key landmark indices for face mesh
-        key_points = [1, 2, 5, 6, 9, 10, 151, 175, 199, 200]  # Eyes, nose, mouth corners
+        available = FACE_KEY_LANDMARKS < len(points)
+        xy = (points[FACE_KEY_LANDMARKS[available], :2] * np.array([width, height], dtype=np.float64)).astype(np.int64)
+        xy += np.array(offset, dtype=np.int64)
+        names = [name for name, keep in zip(FACE_KEY_LANDMARK_NAMES, available) if keep]
         
-        key_landmarks = []
-        for i in key_points:
-            if i < len(landmarks.landmark):
-                landmark = landmarks.landmark[i]
-                key_landmarks.append({
-                    'x': int(landmark.x * width),
-                    'y': int(landmark.y * height),
-                    'name': f'landmark_{i}'
-                })
-        
-        return key_landmarks
-
-    def _get_pose_landmark_name(self, index):
-        """Get pose landmark name by index"""
-        pose_landmarks = [
-            'nose', 'left_eye_inner', 'left_eye', 'left_eye_outer',
-            'right_eye_inner', 'right_eye', 'right_eye_outer',
-            'left_ear', 'right_ear', 'mouth_left', 'mouth_right',
-            'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
-            'left_wrist', 'right_wrist', 'left_pinky', 'right_pinky',
-            'left_index', 'right_index', 'left_thumb', 'right_thumb',
-            'left_hip', 'right_hip', 'left_knee', 'right_knee',
-            'left_ankle', 'right_ankle', 'left_heel', 'right_heel',
-            'left_foot_index', 'right_foot_index'
-        ]
-        return pose_landmarks[index] if index < len(pose_landmarks) else f'landmark_{index}'
-
-    def _get_hand_landmark_name(self, index):
-        """Get hand landmark name by index"""
-        hand_landmarks = [
-            'wrist', 'thumb_cmc', 'thumb_mcp', 'thumb_ip', 'thumb_tip',
-            'index_finger_mcp', 'index_finger_pip', 'index_finger_dip', 'index_finger_tip',
-            'middle_finger_mcp', 'middle_finger_pip', 'middle_finger_dip', 'middle_finger_tip',
-            'ring_finger_mcp', 'ring_finger_pip', 'ring_finger_dip', 'ring_finger_tip',
-            'pinky_mcp', 'pinky_pip', 'pinky_dip', 'pinky_tip'
-        ]
-        return hand_landmarks[index] if index < len(hand_landmarks) else f'landmark_{index}'
+        return [{'x': x, 'y': y, 'name': name} for (x, y), name in zip(xy.tolist(), names)]
+
+# Initialize detection services. MediaPipe graphs are not thread-safe, so
+# each concurrent request checks out its own instance from the pool.
+_primary_service = AIDetectionService()
+detector_pool = DetectorPool(
+    lambda: AIDetectionService(shared=_primary_service),
+    size=env_int('DETECTOR_POOL_SIZE', 2),
+    timeout=env_float('DETECTOR_POOL_TIMEOUT', 10.0),
+    initial=[_primary_service]
+)
+
+def _warm_up_detectors():
+    """Load the enabled models of every pooled instance and run one dummy frame"""
+    started = time.time()
+    instances = []
+    try:
+        # Holding every instance keeps requests off them while they warm up
+        for _ in range(detector_pool.size):
+            instances.append(detector_pool.acquire())
+        dummy = Frame(np.zeros((480, 640, 3), dtype=np.uint8))
+        for instance in instances:
+            instance.load_models()
+            instance.run_detection(dummy, 'all', parallel=False, tier='accurate')
+        logger.info(f"🔥 Warmed up {len(instances)} detector instances in {time.time() - started:.1f}s")
+    except Exception as e:
+        logger.error(f"Warm-up error: {e}")
+    finally:
+        for instance in instances:
+            detector_pool.release(instance)
+
+def start_warmup():
+    """Warm up the detectors in the background when MODEL_WARMUP is set
+
+    Called from each serving process (the dev server entry point or the
+    gunicorn worker hook), never at import time, so no models or threads
+    are created in a process that is about to fork.
+    """
+    if MODEL_WARMUP:
+        threading.Thread(target=_warm_up_detectors, name='warmup', daemon=True).start()
+
+# Admission control for detection requests: at most MAX_ACTIVE_REQUESTS are
+# processed at once (0 disables the limit) and MAX_QUEUED_REQUESTS more may
+# wait REQUEST_QUEUE_TIMEOUT seconds; anything beyond that gets a 503
+LIMITED_ENDPOINTS = ('detect', 'detect_batch', 'detect_video', 'detect_realtime')
+request_limiter = RequestLimiter(
+    max_active=env_int('MAX_ACTIVE_REQUESTS', 0),
+    max_queued=env_int('MAX_QUEUED_REQUESTS', 8),
+    queue_timeout=env_float('REQUEST_QUEUE_TIMEOUT', 5.0)
+)
+
+# Results of repeated uploads of the same image
+result_cache = ResultCache(
+    max_bytes=env_int('RESULT_CACHE_MAX_MB', 64) * 1024 * 1024,
+    disk_dir=os.getenv('RESULT_CACHE_DIR') or None,
+    disk_max_entries=env_int('RESULT_CACHE_DISK_MAX_ENTRIES', 10000)
+)
 
-# Initialize detection service
-detection_service = AIDetectionService()
+# Batch requests decode and detect BATCH_WORKERS images at once on this
+# executor, by default enough to fill a YOLO batch. Objects need no pooled
+# detector; for faces and body parts batch images hold at most
+# BATCH_DETECTORS detectors, one less than the pool, so interactive requests
+# still get one while a long batch runs.
+BATCH_MAX_IMAGES = env_int('BATCH_MAX_IMAGES', 500)
+# Larger images in a batch, including archive entries, fail without being read
+BATCH_MAX_IMAGE_MB = env_int('BATCH_MAX_IMAGE_MB', 50)
+BATCH_POOL_TIMEOUT = env_float('BATCH_POOL_TIMEOUT', 300.0)
+BATCH_WORKERS = max(1, env_int('BATCH_WORKERS', env_int('YOLO_MAX_BATCH_SIZE', 8)))
+BATCH_MAX_IN_FLIGHT = 2 * BATCH_WORKERS
+if detector_pool.size > 1:
+    BATCH_DETECTORS = detector_pool.size - 1
+else:
+    # A lone detector cannot be kept free: batch images take turns with
+    # interactive requests for it, one image at a time
+    BATCH_DETECTORS = 1
+    logger.warning("⚠️ DETECTOR_POOL_SIZE=1: batch images share the only detector with interactive requests")
+batch_detector_slots = threading.BoundedSemaphore(BATCH_DETECTORS)
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+
+# Uploaded images can be decoded by DECODE_PROCESSES worker processes into
+# shared memory slots, off this process's GIL (0 decodes in the request thread)
+decode_ring = DecodeRing(
+    processes=env_int('DECODE_PROCESSES', 0),
+    slots=env_int('DECODE_RING_SLOTS', BATCH_WORKERS + detector_pool.size),
+    slot_bytes=env_int('DECODE_SLOT_MB', 24) * 1024 * 1024,
+    timeout=env_float('DECODE_TIMEOUT', 10.0)
+)
+
+# Each video stream builds its own tracking-mode detectors
+video_slots = threading.BoundedSemaphore(env_int('VIDEO_MAX_STREAMS', 2))
+
+# Realtime clients that send a session ID keep their own tracking-mode
+# detectors between frames
+session_manager = SessionManager(
+    lambda: AIDetectionService(shared=_primary_service, tracking=True),
+    idle_timeout=env_float('REALTIME_SESSION_IDLE_TIMEOUT', 60.0),
+    max_sessions=env_int('REALTIME_MAX_SESSIONS', 8),
+    gate_factory=lambda: MotionGate(
+        threshold=MOTION_THRESHOLD,
+        pixel_delta=MOTION_PIXEL_DELTA,
+        keyframe_interval=MOTION_KEYFRAME_INTERVAL,
+        track_shift=MOTION_TRACK_SHIFT
+    )
+)
+
+@contextmanager
+def _realtime_detector(session_id):
+    """Detector for a realtime frame and its motion gate
+
+    Session frames get the session's own instance and gate; other frames a
+    pooled instance and no gate, as there is no previous frame to compare.
+    """
+    if session_id:
+        with session_manager.checkout(session_id) as session:
+            yield session.service, session.gate
+    else:
+        with detector_pool.checkout() as detection_service:
+            yield detection_service, None
+
+@app.errorhandler(PoolExhausted)
+def pool_exhausted(error):
+    response = jsonify({'success': False, 'error': str(error)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def _model_readiness():
+    """Load state of each model across all pooled detector instances"""
+    statuses = [instance.model_status() for instance in detector_pool.instances]
+    readiness = {}
+    for name in statuses[0]:
+        states = [status[name]['state'] for status in statuses]
+        if 'disabled' in states:
+            state = 'disabled'
+        elif 'failed' in states:
+            state = 'failed'
+        elif all(s == 'ready' for s in states):
+            state = 'ready'
+        elif 'loading' in states:
+            state = 'loading'
+        else:
+            state = 'idle'
+        readiness[name] = {'state': state, 'loadedInstances': states.count('ready'), 'instances': len(states)}
+        errors = [status[name]['error'] for status in statuses if 'error' in status[name]]
+        if errors:
+            readiness[name]['error'] = errors[0]
+    return readiness
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    models = _model_readiness()
     return jsonify({
         'status': 'healthy',
         'service': 'AI Detection Service',
-        'timestamp': time.time()
+        'timestamp': time.time(),
+        'ready': all(model['state'] in ('ready', 'disabled') for model in models.values()),
+        'enabledDetectors': list(ENABLED_DETECTORS),
+        'models': models
     })
 
+@app.before_request
+def track_request_start():
+    g.request_started = time.perf_counter()
+    _requests_in_flight.inc(endpoint=request.endpoint)
+    if request_limiter.enabled and request.endpoint in LIMITED_ENDPOINTS:
+        request_limiter.acquire()
+        g.admitted = True
+
+@app.after_request
+def track_request_end(response):
+    # Runs when the response is closed, so streamed responses count until
+    # their last chunk has been sent
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.endpoint
+
+        def finish():
+            _requests_in_flight.dec(endpoint=endpoint)
+            _request_latency.observe((time.perf_counter() - started) * 1000, endpoint=endpoint)
+        response.call_on_close(finish)
+    if g.pop('admitted', False):
+        response.call_on_close(request_limiter.release)
+    return response
+
+def _serialize(payload):
+    """Encode a response payload in the format the client accepts, timed as the serialization stage"""
+    mimetype = negotiate(request.accept_mimetypes)
+    with stage_latency.timer(stage='serialization'):
+        if mimetype == JSON_MIMETYPE:
+            response = jsonify(payload)
+        else:
+            response = Response(
+                encode(payload, mimetype, RESULT_SCHEMA), mimetype=mimetype, headers={SCHEMA_HEADER: schema_header()}
+            )
+    # The body depends on the Accept header, so shared caches must key on it
+    response.vary.add('Accept')
+    return response
+
+def _ndjson_line(payload, mimetype=JSON_MIMETYPE):
+    """One item of a streamed response, timed as the serialization stage
+
+    JSON and compact JSON items are NDJSON lines; MessagePack items are
+    self-delimiting and simply follow each other.
+    """
+    with stage_latency.timer(stage='serialization'):
+        if mimetype == JSON_MIMETYPE:
+            return json.dumps(payload) + '\n'
+        body = encode(payload, mimetype, RESULT_SCHEMA)
+    return body + '\n' if isinstance(body, str) else body
+
+def _stream_response(items, mimetype):
+    """Streamed response for items encoded by _ndjson_line with mimetype"""
+    response = Response(stream_with_context(items), mimetype=stream_mimetype(mimetype))
+    if mimetype != JSON_MIMETYPE:
+        response.headers[SCHEMA_HEADER] = schema_header()
+    response.vary.add('Accept')
+    return response
+
+@app.route('/api/schema', methods=['GET'])
+def result_schema():
+    """Names and field order of the compact response layout"""
+    return jsonify(RESULT_SCHEMA)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """All service metrics in the Prometheus text format"""
+    return Response(registry.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/stats', methods=['GET'])
+def stats():
+    """Service metrics such as YOLO batch size and queue wait histograms"""
+    return jsonify(registry.snapshot())
+
+def _detect_image(file_bytes, detection_type, parallel, tier, pool_timeout=None, object_options=None, batch=False):
+    """Decode an encoded image and run detection, or return None if it is not an image
+
+    Images of batch requests detect objects before taking a pooled detector,
+    and hold at most BATCH_DETECTORS of them.
+    """
+    # Shrink large JPEGs while decoding when the tier allows it
+    with stage_latency.timer(stage='decode'):
+        decoded = decode_ring.decode(file_bytes, _decode_max_side(detection_type, tier))
+    # Pixels decoded by a worker are read in place and the slot freed afterwards
+    with decoded:
+        return _detect_decoded(
+            decoded.image, decoded.original_size, detection_type, parallel, tier, pool_timeout, object_options,
+            batch
+        )
+
+def _detect_decoded(bgr_image, original_size, detection_type, parallel, tier, pool_timeout=None,
+                    object_options=None, batch=False):
+    """Run detection on a decoded image, serving repeated images from the result cache"""
+    if bgr_image is None:
+        return None
+
+    # Identical images with the same settings are served from the cache
+    cache_key = None
+    results = None
+    if result_cache.enabled:
+        with stage_latency.timer(stage='cache_lookup'):
+            cache_key = image_cache_key(bgr_image, detection_type, tier, RESULTS_CONFIG, object_options)
+            results = result_cache.get(cache_key)
+
+    if results is None:
+        frame = Frame(bgr_image, original_size=original_size)
+        selected = _selected_detectors(detection_type)
+        objects = None
+        if batch and 'objects' in selected:
+            # YOLO needs no pooled detector, so the frames of every batch image
+            # in flight share the batcher's forward passes
+            objects = _primary_service.detect_frame_objects(frame, detection_type, tier, object_options)
+
+        if objects is not None and selected == ['objects']:
+            # Nothing left to run needs a pooled detector
+            results = _primary_service.run_detection(
+                frame, detection_type, tier=tier, object_options=object_options, objects=objects
+            )
+        else:
+            # Perform detection based on type
+            with batch_detector_slots if batch else nullcontext():
+                with detector_pool.checkout(pool_timeout) as detection_service:
+                    results = detection_service.run_detection(
+                        frame, detection_type, parallel=parallel, tier=tier, object_options=object_options,
+                        objects=objects
+                    )
+        if cache_key is not None:
+            result_cache.put(cache_key, results)
+        results['cached'] = False
+    else:
+        results['cached'] = True
+        results['timings'] = {}
+
+    results['totalDetections'] = len(results['faces']) + len(results['bodyParts']) + len(results['objects'])
+    return results
+
 @app.route('/api/detect', methods=['POST'])
 def detect():
     """Main detection endpoint for uploaded files"""
@@ -444,50 +1263,43 @@ def detect():
         
         file = request.files['file']
         detection_type = request.form.get('detection_type', 'both')
+        parallel = parse_bool(request.form.get('parallel'), PARALLEL_DETECTORS)
+        tier = request.form.get('tier') or DEFAULT_RESOLUTION_TIER
         
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
 
-        # Read and process image
-        file_bytes = file.read()
-        nparr = np.frombuffer(file_bytes, np.uint8)
-        bgr_image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if bgr_image is None:
-            return jsonify({'error': 'Invalid image file'}), 400
-
-        rgb_image = cv2.cvtColor(bgr_image, cv2.COLOR_BGR2RGB)
-
-        # Perform detection based on type
-        results = {
-            'faces': [],
-            'bodyParts': [],
-            'objects': [],
-            'processingTime': 0,
-            'totalDetections': 0
-        }
+        if tier not in RESOLUTION_TIERS:
+            return jsonify({'error': f'Unknown tier: {tier}'}), 400
 
-        if detection_type in ['face', 'both', 'all']:
-            results['faces'] = detection_service.detect_faces(rgb_image, bgr_image)
+        try:
+            object_options = _object_options(request.form, detection_type)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        if detection_type in ['body', 'both', 'all']:
-            results['bodyParts'] = detection_service.detect_body_parts(rgb_image)
+        # This endpoint answers with a single JSON document; videos are streamed
+        if is_video_upload(file):
+            return jsonify({'error': 'Video uploads are processed by /api/detect-video'}), 400
 
-        if detection_type in ['object', 'objects', 'all']:
-            results['objects'] = detection_service.detect_objects(bgr_image)
+        # Read and process image
+        results = _detect_image(file.read(), detection_type, parallel, tier, object_options=object_options)
+        
+        if results is None:
+            return jsonify({'error': 'Invalid image file'}), 400
 
         # Calculate processing time
         processing_time = int((time.time() - start_time) * 1000)
         results['processingTime'] = processing_time
-        results['totalDetections'] = len(results['faces']) + len(results['bodyParts']) + len(results['objects'])
 
-        logger.info(f"Detection completed in {processing_time}ms - Faces: {len(results['faces'])}, Body parts: {len(results['bodyParts'])}, Objects: {len(results['objects'])}")
+        logger.info(f"Detection completed in {processing_time}ms - Faces: {len(results['faces'])}, Body parts: {len(results['bodyParts'])}, Objects: {len(results['objects'])}, Cached: {results['cached']}")
 
-        return jsonify({
+        return _serialize({
             'success': True,
             'results': results
         })
 
+    except PoolExhausted:
+        raise
     except Exception as e:
         logger.error(f"Detection error: {e}")
         return jsonify({
@@ -495,72 +1307,308 @@ def detect():
             'error': str(e)
         }), 500
 
+@app.route('/api/detect-batch', methods=['POST'])
+def detect_batch():
+    """Batch detection endpoint streaming per-image results as NDJSON
+
+    Images come as multipart 'files' parts (images or zip/tar archives) or
+    as a raw zip/tar body with parameters in the query string. Images are
+    decoded and detected on a worker pool, so concurrent YOLO calls share
+    batched forward passes, and each result line is sent as soon as that
+    image finishes.
+    """
+    detection_type = request.values.get('detection_type', 'both')
+    tier = request.values.get('tier') or DEFAULT_RESOLUTION_TIER
+    if tier not in RESOLUTION_TIERS:
+        return jsonify({'error': f'Unknown tier: {tier}'}), 400
+    try:
+        object_options = _object_options(request.values, detection_type)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response_format = negotiate(request.accept_mimetypes)
+
+    def process(index, item):
+        name, file_bytes = item
+        if file_bytes is None:
+            return {
+                'type': 'result', 'index': index, 'filename': name, 'success': False,
+                'error': f'Image exceeds {BATCH_MAX_IMAGE_MB} MB'
+            }
+        image_start = time.time()
+        try:
+            # Parallelism comes from running several images at once
+            results = _detect_image(
+                file_bytes, detection_type, False, tier, pool_timeout=BATCH_POOL_TIMEOUT,
+                object_options=object_options, batch=True
+            )
+            if results is None:
+                return {'type': 'result', 'index': index, 'filename': name, 'success': False, 'error': 'Invalid image file'}
+            results['processingTime'] = int((time.time() - image_start) * 1000)
+            return {'type': 'result', 'index': index, 'filename': name, 'success': True, 'results': results}
+        except Exception as e:
+            logger.error(f"Batch detection error for {name}: {e}")
+            return {'type': 'result', 'index': index, 'filename': name, 'success': False, 'error': str(e)}
+
+    truncated = False
+
+    def inputs():
+        # Read lazily while results stream out: the streamed response keeps
+        # the request, and its uploaded files, open until the last line
+        nonlocal truncated
+        for count, item in enumerate(iter_batch_inputs(request, BATCH_MAX_IMAGE_MB * 1024 * 1024)):
+            if count >= BATCH_MAX_IMAGES:
+                truncated = True
+                return
+            yield item
+
+    def generate():
+        start_time = time.time()
+        images, failed = 0, 0
+        try:
+            for line in stream_completed(batch_executor, inputs(), process, BATCH_MAX_IN_FLIGHT):
+                images += 1
+                failed += 0 if line['success'] else 1
+                yield _ndjson_line(line, response_format)
+
+            processing_time = int((time.time() - start_time) * 1000)
+            logger.info(f"Batch detection completed in {processing_time}ms - Images: {images}, Failed: {failed}")
+            summary = {
+                'type': 'summary',
+                'success': True,
+                'images': images,
+                'failed': failed,
+                'processingTime': processing_time
+            }
+            if truncated:
+                logger.warning(f"Batch truncated to its first {BATCH_MAX_IMAGES} images")
+                summary['truncated'] = True
+                summary['maxImages'] = BATCH_MAX_IMAGES
+            yield _ndjson_line(summary, response_format)
+        except Exception as e:
+            logger.error(f"Batch detection error: {e}")
+            yield _ndjson_line({'type': 'error', 'success': False, 'error': str(e)}, response_format)
+
+    return _stream_response(generate(), response_format)
+
+@app.route('/api/detect-video', methods=['POST'])
+def detect_video():
+    """Video detection endpoint streaming per-frame results as NDJSON"""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file provided'}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+
+    detection_type = request.form.get('detection_type', 'both')
+    parallel = parse_bool(request.form.get('parallel'), PARALLEL_DETECTORS)
+    tier = request.form.get('tier') or DEFAULT_RESOLUTION_TIER
+    if tier not in RESOLUTION_TIERS:
+        return jsonify({'error': f'Unknown tier: {tier}'}), 400
+    try:
+        object_options = _object_options(request.form, detection_type)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return _stream_video_detection(file, detection_type, parallel, tier, object_options)
+
+def _stream_video_detection(file, detection_type, parallel, tier, object_options=None):
+    """Decode an uploaded video incrementally and stream results frame by frame
+
+    The upload is spooled to a temporary file so cv2.VideoCapture can read
+    it one frame at a time. Each output line is a JSON object: a 'video'
+    header, one 'frame' entry per processed frame, then a 'summary'.
+    """
+    try:
+        frame_stride = int(request.form.get('frame_stride', 0)) or None
+        target_fps = float(request.form.get('target_fps', 0)) or None
+        max_frames = int(request.form.get('max_frames', 0)) or None
+    except ValueError:
+        return jsonify({'error': 'Invalid frame sampling parameters'}), 400
+    if any(value is not None and not (math.isfinite(value) and value > 0)
+           for value in (frame_stride, target_fps, max_frames)):
+        return jsonify({'error': 'Frame sampling parameters must be positive numbers'}), 400
+
+    if not video_slots.acquire(timeout=detector_pool.timeout):
+        raise PoolExhausted("All video detection slots are busy, try again later")
+
+    path = None
+    reader = None
+    tracker = None
+
+    def cleanup():
+        if tracker is not None:
+            tracker.close()
+        if reader is not None:
+            reader.close()
+        if path is not None:
+            os.remove(path)
+        video_slots.release()
+
+    # Until the response owns cleanup, any error must release the slot,
+    # the temporary file and the capture here
+    try:
+        suffix = os.path.splitext(file.filename or '')[1] or '.mp4'
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        os.close(handle)
+        try:
+            file.save(path)
+            reader = VideoReader(path)
+        except Exception as e:
+            cleanup()
+            logger.error(f"Video open error: {e}")
+            return jsonify({'success': False, 'error': 'Invalid video file'}), 400
+
+        stride = frame_stride_for(reader.fps, frame_stride, target_fps)
+        response_format = negotiate(request.accept_mimetypes)
+
+        def generate():
+            nonlocal tracker
+            start_time = time.time()
+            frames_processed = 0
+            try:
+                yield _ndjson_line({'type': 'video', 'frameStride': stride, **reader.info()}, response_format)
+                tracker = AIDetectionService(shared=_primary_service, tracking=True)
+                for frame_index, timestamp, bgr_frame in reader.frames(stride, max_frames):
+                    frame_start = time.time()
+                    results = tracker.run_detection(
+                        Frame(bgr_frame), detection_type, parallel=parallel, tier=tier, object_options=object_options
+                    )
+                    results['processingTime'] = int((time.time() - frame_start) * 1000)
+                    results['totalDetections'] = len(results['faces']) + len(results['bodyParts']) + len(results['objects'])
+                    frames_processed += 1
+                    yield _ndjson_line({
+                        'type': 'frame',
+                        'frameIndex': frame_index,
+                        'timestamp': timestamp,
+                        'results': results
+                    }, response_format)
+
+                processing_time = int((time.time() - start_time) * 1000)
+                logger.info(f"Video detection completed in {processing_time}ms - Frames: {frames_processed}")
+                yield _ndjson_line({
+                    'type': 'summary',
+                    'success': True,
+                    'framesProcessed': frames_processed,
+                    'processingTime': processing_time
+                }, response_format)
+            except Exception as e:
+                logger.error(f"Video detection error: {e}")
+                yield _ndjson_line({'type': 'error', 'success': False, 'error': str(e)}, response_format)
+
+        # Runs once the response is closed, including when the client disconnects
+        # before the stream starts
+        response = _stream_response(generate(), response_format)
+        response.call_on_close(cleanup)
+        return response
+    except BaseException:
+        cleanup()
+        raise
+
 @app.route('/api/detect-realtime', methods=['POST'])
 def detect_realtime():
     """Real-time detection endpoint"""
     try:
         start_time = time.time()
-        
-        data = request.get_json()
-        logger.info(f"🔍 Received realtime detection request")
-        logger.info(f"📦 Request data keys: {list(data.keys()) if data else 'No data'}")
-        
-        if not data:
-            logger.error("❌ No JSON data provided")
-            return jsonify({'error': 'No JSON data provided', 'success': False}), 400
 
-        # Handle both camelCase and snake_case field names
-        image_data = data.get('image_data') or data.get('imageData')
+        # Per-frame details are formatted only when DEBUG logging is on
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("🔍 Received realtime detection request")
+
+        if request.mimetype in BINARY_FRAME_MIMETYPES:
+            # Raw encoded frame in the body, parameters in the query string
+            data = request.args
+            image_data = request.get_data(cache=False)
+        else:
+            data = request.get_json()
+            if debug:
+                logger.debug(f"📦 Request data keys: {list(data.keys()) if data else 'No data'}")
+
+            if not data:
+                logger.error("❌ No JSON data provided")
+                return jsonify({'error': 'No JSON data provided', 'success': False}), 400
+
+            # Handle both camelCase and snake_case field names
+            image_data = data.get('image_data') or data.get('imageData')
+
         detection_type = data.get('detection_type') or data.get('detectionType') or 'both'
+        parallel = parse_bool(data.get('parallel'), PARALLEL_DETECTORS)
+        session_id = data.get('session_id') or data.get('sessionId')
+        session_id = str(session_id) if session_id else None
+        tier = data.get('tier') or DEFAULT_RESOLUTION_TIER
+        motion_gate = parse_bool(data.get('motion_gate'), MOTION_GATE)
         
+        if tier not in RESOLUTION_TIERS:
+            return jsonify({'error': f'Unknown tier: {tier}', 'success': False}), 400
+
+        try:
+            object_options = _object_options(data, detection_type)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'success': False}), 400
+
         if not image_data:
             logger.error("❌ No image data provided")
             return jsonify({'error': 'No image data provided', 'success': False}), 400
         
-        logger.info(f"📊 Image data length: {len(image_data) if image_data else 0}")
-        logger.info(f"🎯 Detection type: {detection_type}")
-        
-        if image_data:
-            logger.info(f"🖼️ Image data preview: {image_data[:100]}...")
+        if debug:
+            logger.debug(f"📊 Image data length: {len(image_data)}")
+            logger.debug(f"🎯 Detection type: {detection_type}")
+            if isinstance(image_data, str):
+                logger.debug(f"🖼️ Image data preview: {image_data[:100]}...")
 
         # Preprocess image
-        bgr_image, rgb_image = detection_service.preprocess_image(image_data)
-        logger.info(f"✅ Image preprocessed successfully. Shape: {rgb_image.shape}")
+        bgr_image, rgb_image = _primary_service.preprocess_image(image_data)
+        if debug:
+            logger.debug(f"✅ Image preprocessed successfully. Shape: {rgb_image.shape}")
 
         # Perform detection
-        results = {
-            'faces': [],
-            'bodyParts': [],
-            'objects': [],
-            'processingTime': 0
-        }
-
-        if detection_type in ['face', 'both', 'all']:
-            faces = detection_service.detect_faces(rgb_image, bgr_image)
-            results['faces'] = faces
-            logger.info(f"👤 Detected {len(faces)} faces")
-
-        if detection_type in ['body', 'both', 'all']:
-            body_parts = detection_service.detect_body_parts(rgb_image)
-            results['bodyParts'] = body_parts
-            logger.info(f"🦴 Detected {len(body_parts)} body parts")
+        with _realtime_detector(session_id) as (detection_service, gate):
+            # Unchanged frames of a stream reuse the results of the last detected frame
+            results = None
+            if gate is not None and motion_gate:
+                results = gate.reuse(bgr_image, (detection_type, tier, object_options))
+            if results is not None:
+                results['timings'] = {}
+                results['gated'] = True
+            else:
+                results = detection_service.run_detection(
+                    Frame(bgr_image, rgb=rgb_image), detection_type, parallel=parallel, tier=tier,
+                    object_options=object_options
+                )
+                # Ungated frames still refresh the reference, so turning the
+                # gate back on never compares against a stale frame
+                if gate is not None:
+                    gate.remember(
+                        (detection_type, tier, object_options), results, None if motion_gate else bgr_image
+                    )
+                    if motion_gate:
+                        results['gated'] = False
 
-        if detection_type in ['object', 'objects', 'all']:
-            objects = detection_service.detect_objects(bgr_image)
-            results['objects'] = objects
-            logger.info(f"🎯 Detected {len(objects)} objects")
+        if debug:
+            logger.debug(f"👤 Detected {len(results['faces'])} faces")
+            logger.debug(f"🦴 Detected {len(results['bodyParts'])} body parts")
+            logger.debug(f"🎯 Detected {len(results['objects'])} objects")
 
         # Calculate processing time
         processing_time = int((time.time() - start_time) * 1000)
         results['processingTime'] = processing_time
-        
-        logger.info(f"⏱️ Processing completed in {processing_time}ms")
 
-        return jsonify({
+        # Only a sample of frames is summarized at INFO level
+        frame_number = next(_realtime_frames)
+        if REALTIME_LOG_EVERY > 0 and frame_number % REALTIME_LOG_EVERY == 0:
+            logger.info(f"⏱️ Realtime frame {frame_number} processed in {processing_time}ms")
+
+        response = {
             'success': True,
             'results': results
-        })
+        }
+        if session_id:
+            response['sessionId'] = session_id
+        return _serialize(response)
 
+    except PoolExhausted:
+        raise
     except Exception as e:
         logger.error(f"❌ Real-time detection error: {e}")
         return jsonify({
@@ -568,6 +1616,102 @@ def detect_realtime():
             'error': str(e)
         }), 500
 
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+def close_session(session_id):
+    """End a realtime session and release its detectors"""
+    if not session_manager.close(session_id):
+        return jsonify({'error': 'Session not found', 'success': False}), 404
+    return jsonify({'success': True, 'sessionId': session_id})
+
+def _run_job(payload):
+    """Detect the image of one asynchronous job"""
+    started = time.time()
+    # Jobs share the batch images' detector budget, so interactive requests
+    # still find a free detector while jobs run back to back
+    results = _detect_image(
+        payload['image'], payload['detection_type'], payload['parallel'], payload['tier'],
+        pool_timeout=JOB_POOL_TIMEOUT, object_options=payload['object_options'], batch=True
+    )
+    if results is None:
+        raise ValueError("Invalid image file")
+    results['processingTime'] = int((time.time() - started) * 1000)
+    return results
+
+# Asynchronous detection jobs run on JOB_WORKERS threads by priority; at most
+# JOB_MAX_QUEUED wait, and finished jobs are kept JOB_RESULT_TTL seconds.
+# Callback URLs must point to one of JOB_CALLBACK_HOSTS when it is set, and
+# to a public address otherwise.
+JOB_POOL_TIMEOUT = env_float('JOB_POOL_TIMEOUT', 300.0)
+JOB_CALLBACK_HOSTS = {host.strip().lower() for host in os.getenv('JOB_CALLBACK_HOSTS', '').split(',') if host.strip()}
+job_queue = JobQueue(
+    _run_job,
+    workers=env_int('JOB_WORKERS', 2),
+    max_queued=env_int('JOB_MAX_QUEUED', 100),
+    result_ttl=env_float('JOB_RESULT_TTL', 600.0),
+    callback_timeout=env_float('JOB_CALLBACK_TIMEOUT', 10.0),
+    callback_hosts=JOB_CALLBACK_HOSTS
+)
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue an uploaded image for detection and return its job ID right away"""
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file provided'}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    if is_video_upload(file):
+        return jsonify({'error': 'Video jobs are not supported, use /api/detect-video'}), 400
+
+    tier = request.form.get('tier') or DEFAULT_RESOLUTION_TIER
+    if tier not in RESOLUTION_TIERS:
+        return jsonify({'error': f'Unknown tier: {tier}'}), 400
+    detection_type = request.form.get('detection_type', 'both')
+    priority = request.form.get('priority') or DEFAULT_JOB_PRIORITY
+    if priority not in JOB_PRIORITIES:
+        return jsonify({'error': f'Unknown priority: {priority}'}), 400
+    try:
+        object_options = _object_options(request.form, detection_type)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # The callback host is resolved and checked here, once, and the callback
+    # is later sent to that same address
+    try:
+        job = job_queue.submit({
+            'image': file.read(),
+            'detection_type': detection_type,
+            'parallel': parse_bool(request.form.get('parallel'), PARALLEL_DETECTORS),
+            'tier': tier,
+            'object_options': object_options
+        }, priority=priority, callback_url=request.form.get('callback_url') or None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    logger.info(f"📥 Queued job {job.id} ({priority})")
+
+    response = jsonify({'success': True, **job.to_dict()})
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response, 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a job, with its results once it has completed"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found', 'success': False}), 404
+    return _serialize({'success': True, **job.to_dict()})
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a job that has not finished yet"""
+    job, cancelled = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found', 'success': False}), 404
+    if not cancelled:
+        return jsonify({'error': f'Job already {job.status}', 'success': False, 'status': job.status}), 409
+    return jsonify({'success': True, 'jobId': job.id, 'status': job.status})
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
@@ -580,5 +1724,6 @@ if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     
-    logger.info(f"Starting AI Detection Service on port {port}")
+    logger.info(f"Starting AI Detection Service on port {port} (development server, use gunicorn -c gunicorn.conf.py wsgi:application in production)")
+    start_warmup()
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,278 @@
+import ast
+import os
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+# Boxes found in one image: (N, 4) xyxy pixel boxes, (N,) confidences and
+# (N,) integer class ids, all in the coordinates of the image passed in
+Detections = namedtuple('Detections', ('xyxy', 'conf', 'cls'))
+
+OBJECT_BACKENDS = ('ultralytics', 'onnxruntime', 'openvino')
+
+# Default model file for each backend, e.g. made with
+# `yolo export model=yolov8n.pt format=onnx`
+DEFAULT_OBJECT_MODELS = {
+    'ultralytics': 'yolov8n.pt',
+    'onnxruntime': 'yolov8n.onnx',
+    'openvino': 'yolov8n_openvino_model'
+}
+
+# INT8 models produced by tools/quantize.py
+OBJECT_PRECISIONS = ('fp32', 'int8')
+DEFAULT_INT8_OBJECT_MODELS = {
+    'onnxruntime': 'yolov8n_int8.onnx',
+    'openvino': 'yolov8n_int8_openvino_model'
+}
+
+# Post-processing defaults of ultralytics predict(), so every backend
+# returns the same boxes for the same model
+DEFAULT_CONF_THRESHOLD = 0.25
+DEFAULT_IOU_THRESHOLD = 0.7
+DEFAULT_MAX_DETECTIONS = 300
+MAX_NMS_CANDIDATES = 30000
+# Offset per class id so one NMS pass never suppresses across classes
+CLASS_OFFSET = 7680
+
+# Post-processing applied inside predict(): minimum confidence, NMS IoU
+# threshold, maximum boxes per image and the class ids to keep (None keeps
+# every class). Hashable, so frames can be batched by their options.
+ObjectOptions = namedtuple('ObjectOptions', ('conf', 'iou', 'max_det', 'classes'))
+DEFAULT_OBJECT_OPTIONS = ObjectOptions(DEFAULT_CONF_THRESHOLD, DEFAULT_IOU_THRESHOLD, DEFAULT_MAX_DETECTIONS, None)
+
+LETTERBOX_COLOR = (114, 114, 114)
+
+
+def empty_detections():
+    return Detections(np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64))
+
+
+def letterbox(image, size=(640, 640), stride=32, auto=False):
+    """Resize keeping the aspect ratio and pad to size, the way ultralytics does
+
+    With auto, the padding only reaches the next multiple of stride rather
+    than the full size. Returns the padded image, the resize gain and the
+    (left, top) padding.
+    """
+    height, width = image.shape[:2]
+    gain = min(size[0] / height, size[1] / width)
+    new_width, new_height = int(round(width * gain)), int(round(height * gain))
+    pad_w, pad_h = size[1] - new_width, size[0] - new_height
+    if auto:
+        pad_w, pad_h = pad_w % stride, pad_h % stride
+    pad_w, pad_h = pad_w / 2, pad_h / 2
+
+    if (width, height) != (new_width, new_height):
+        image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_h - 0.1)), int(round(pad_h + 0.1))
+    left, right = int(round(pad_w - 0.1)), int(round(pad_w + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR)
+    return image, gain, (left, top)
+
+
+def nms(boxes, scores, iou_threshold):
+    """Indices of the boxes kept by greedy non-maximum suppression, best first"""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size:
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        inter_w = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+        inter_h = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+        inter = inter_w * inter_h
+        iou = inter / (areas[best] + areas[rest] - inter + 1e-7)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def postprocess(prediction, conf_threshold=DEFAULT_CONF_THRESHOLD, iou_threshold=DEFAULT_IOU_THRESHOLD,
+                max_detections=DEFAULT_MAX_DETECTIONS, classes=None):
+    """Turn one raw YOLOv8 output of shape (4 + classes, anchors) into Detections
+
+    Like ultralytics, each anchor takes its best class, and anchors whose
+    class is not in ``classes`` are dropped before NMS.
+    """
+    prediction = prediction.T
+    class_scores = prediction[:, 4:]
+    cls = class_scores.argmax(axis=1)
+    conf = class_scores[np.arange(len(cls)), cls]
+
+    candidates = conf > conf_threshold
+    if classes is not None:
+        candidates &= np.isin(cls, classes)
+    if not candidates.any():
+        return empty_detections()
+    boxes, conf, cls = prediction[candidates, :4], conf[candidates], cls[candidates]
+    if len(conf) > MAX_NMS_CANDIDATES:
+        top = np.argsort(-conf, kind='stable')[:MAX_NMS_CANDIDATES]
+        boxes, conf, cls = boxes[top], conf[top], cls[top]
+
+    # Centre/size to corners
+    xyxy = np.empty_like(boxes)
+    xyxy[:, :2] = boxes[:, :2] - boxes[:, 2:] / 2
+    xyxy[:, 2:] = boxes[:, :2] + boxes[:, 2:] / 2
+
+    keep = nms(xyxy + (cls * CLASS_OFFSET)[:, None], conf, iou_threshold)[:max_detections]
+    return Detections(xyxy[keep], conf[keep], cls[keep].astype(np.int64))
+
+
+def scale_detections(detections, gain, pad, image_shape):
+    """Map letterboxed boxes back onto the original image, clipped to its bounds"""
+    xyxy = (detections.xyxy - (pad[0], pad[1], pad[0], pad[1])) / gain
+    height, width = image_shape[:2]
+    xyxy[:, 0::2] = xyxy[:, 0::2].clip(0, width)
+    xyxy[:, 1::2] = xyxy[:, 1::2].clip(0, height)
+    return detections._replace(xyxy=xyxy)
+
+
+class UltralyticsBackend:
+    """The ultralytics YOLO engine running the PyTorch weights"""
+
+    name = 'ultralytics'
+
+    def __init__(self, model_path):
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+
+    def predict(self, images, options=DEFAULT_OBJECT_OPTIONS):
+        results = self.model(
+            images, verbose=False, conf=options.conf, iou=options.iou, max_det=options.max_det,
+            classes=list(options.classes) if options.classes is not None else None
+        )
+        return [self._to_detections(result) for result in results]
+
+    @staticmethod
+    def _to_detections(result):
+        boxes = result.boxes
+        if boxes is None or not len(boxes):
+            return empty_detections()
+        # One device-to-host copy of all columns: x1, y1, x2, y2, [track id,] conf, cls
+        data = boxes.data.cpu().numpy()
+        return Detections(data[:, :4], data[:, -2], data[:, -1].astype(np.int64))
+
+
+class ExportedModelBackend:
+    """Base for exported YOLOv8 graphs that need their own pre/post-processing
+
+    Subclasses set ``input_shape`` (NCHW, with non-int entries for dynamic
+    axes) and ``names``, and implement ``_infer`` on a float32 NCHW batch.
+    """
+
+    name = None
+    input_shape = (1, 3, 640, 640)
+    names = {}
+
+    def predict(self, images, options=DEFAULT_OBJECT_OPTIONS):
+        if not images:
+            return []
+        size = tuple(d if isinstance(d, int) else 640 for d in self.input_shape[2:])
+        dynamic_size = not all(isinstance(d, int) for d in self.input_shape[2:])
+        # Minimal stride padding needs every image of the batch to match
+        auto = dynamic_size and len({image.shape for image in images}) == 1
+
+        letterboxed = [letterbox(image, size, auto=auto) for image in images]
+        batch = np.stack([padded for padded, _, _ in letterboxed])
+        batch = np.ascontiguousarray(batch[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+
+        if isinstance(self.input_shape[0], int):
+            # Fixed batch size graphs run one image at a time
+            outputs = np.concatenate([self._infer(batch[i:i + 1]) for i in range(len(batch))])
+        else:
+            outputs = self._infer(batch)
+
+        return [
+            scale_detections(postprocess(output, *options), gain, pad, image.shape)
+            for output, image, (_, gain, pad) in zip(outputs, images, letterboxed)
+        ]
+
+    def _infer(self, batch):
+        raise NotImplementedError
+
+    @staticmethod
+    def _parse_names(value):
+        """Class names stored as a dict literal in exported model metadata"""
+        try:
+            return {int(k): v for k, v in ast.literal_eval(value).items()}
+        except (ValueError, SyntaxError, AttributeError):
+            return {}
+
+
+class OnnxRuntimeBackend(ExportedModelBackend):
+    """YOLOv8 exported to ONNX, run on the ONNX Runtime CPU provider"""
+
+    name = 'onnxruntime'
+
+    def __init__(self, model_path, threads=0):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_shape = tuple(model_input.shape)
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = self._parse_names(metadata.get('names', '{}'))
+
+    def _infer(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVinoBackend(ExportedModelBackend):
+    """YOLOv8 exported to OpenVINO IR (or ONNX), compiled for the CPU plugin"""
+
+    name = 'openvino'
+
+    def __init__(self, model_path, threads=0):
+        import openvino as ov
+        core = ov.Core()
+        model_dir = model_path
+        if os.path.isdir(model_path):
+            model_path = next(
+                os.path.join(model_path, f) for f in sorted(os.listdir(model_path)) if f.endswith('.xml')
+            )
+        else:
+            model_dir = os.path.dirname(model_path)
+        model = core.read_model(model_path)
+        config = {'INFERENCE_NUM_THREADS': threads} if threads else {}
+        self.compiled = core.compile_model(model, 'CPU', config)
+        self.input_shape = tuple(
+            d.get_length() if d.is_static else None for d in model.inputs[0].get_partial_shape()
+        )
+        self.names = self._read_names(model_dir)
+
+    def _read_names(self, model_dir):
+        """Class names from the metadata.yaml ultralytics writes next to the IR"""
+        metadata_path = os.path.join(model_dir, 'metadata.yaml')
+        if not os.path.exists(metadata_path):
+            return {}
+        import yaml
+        with open(metadata_path, 'r', encoding='utf-8') as handle:
+            names = (yaml.safe_load(handle) or {}).get('names', {})
+        return {int(k): v for k, v in names.items()}
+
+    def _infer(self, batch):
+        return self.compiled(batch)[self.compiled.output(0)]
+
+
+def create_object_backend(backend=None, model_path=None, threads=0, precision='fp32'):
+    """Load the object detection backend selected by name and precision"""
+    backend = backend or 'ultralytics'
+    if backend not in OBJECT_BACKENDS:
+        raise ValueError(f"Unknown object backend {backend!r}, expected one of {', '.join(OBJECT_BACKENDS)}")
+    if precision not in OBJECT_PRECISIONS:
+        raise ValueError(f"Unknown precision {precision!r}, expected one of {', '.join(OBJECT_PRECISIONS)}")
+    if precision == 'int8':
+        if backend not in DEFAULT_INT8_OBJECT_MODELS:
+            raise ValueError("INT8 object detection needs the onnxruntime or openvino backend")
+        model_path = model_path or DEFAULT_INT8_OBJECT_MODELS[backend]
+    model_path = model_path or DEFAULT_OBJECT_MODELS[backend]
+    if backend == 'onnxruntime':
+        return OnnxRuntimeBackend(model_path, threads)
+    if backend == 'openvino':
+        return OpenVinoBackend(model_path, threads)
+    return UltralyticsBackend(model_path)
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+ZIP_MIMETYPES = ('application/zip', 'application/x-zip-compressed')
+TAR_MIMETYPES = ('application/x-tar', 'application/gzip', 'application/x-gzip', 'application/x-gtar')
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+# Zip archives are spooled to disk above this size, since zipfile needs to seek
+ZIP_SPOOL_BYTES = 32 * 1024 * 1024
+
+
+def _is_image_name(name):
+    base = os.path.basename(name)
+    return not base.startswith('.') and base.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def _read_limited(fileobj, max_bytes):
+    """Read fileobj, or return None if it holds more than max_bytes"""
+    if max_bytes is None:
+        return fileobj.read()
+    data = fileobj.read(max_bytes + 1)
+    return None if len(data) > max_bytes else data
+
+
+def _too_large(size, max_bytes):
+    return max_bytes is not None and size > max_bytes
+
+
+def iter_zip_images(stream, max_bytes=None):
+    """Yield (name, bytes) for every image in a zip archive read from a stream
+
+    Images larger than max_bytes are yielded as (name, None) without being
+    decompressed.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_BYTES) as spool:
+        shutil.copyfileobj(stream, spool)
+        spool.seek(0)
+        with zipfile.ZipFile(spool) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not _is_image_name(info.filename):
+                    continue
+                if _too_large(info.file_size, max_bytes):
+                    yield info.filename, None
+                    continue
+                # The declared size is not trusted: the read itself is bounded too
+                with archive.open(info) as entry:
+                    yield info.filename, _read_limited(entry, max_bytes)
+
+
+def iter_tar_images(stream, max_bytes=None):
+    """Yield (name, bytes) for every image in a tar archive, reading it sequentially
+
+    Images larger than max_bytes are yielded as (name, None) and skipped.
+    """
+    with tarfile.open(fileobj=stream, mode='r|*') as archive:
+        for member in archive:
+            if not member.isfile() or not _is_image_name(member.name):
+                continue
+            if _too_large(member.size, max_bytes):
+                yield member.name, None
+                continue
+            yield member.name, _read_limited(archive.extractfile(member), max_bytes)
+
+
+def iter_batch_inputs(request, max_bytes=None):
+    """Yield (name, bytes) for each image of a batch request
+
+    Accepts a raw zip or tar body, or a multipart upload whose 'files' (or
+    'file') parts are images and/or zip/tar archives. Images larger than
+    max_bytes are yielded as (name, None).
+    """
+    if request.mimetype in ZIP_MIMETYPES:
+        yield from iter_zip_images(request.stream, max_bytes)
+        return
+    if request.mimetype in TAR_MIMETYPES:
+        yield from iter_tar_images(request.stream, max_bytes)
+        return
+
+    for upload in request.files.getlist('files') + request.files.getlist('file'):
+        name = (upload.filename or '').lower()
+        if name.endswith('.zip'):
+            yield from iter_zip_images(upload.stream, max_bytes)
+        elif name.endswith(TAR_SUFFIXES):
+            yield from iter_tar_images(upload.stream, max_bytes)
+        elif upload.filename:
+            yield upload.filename, _read_limited(upload.stream, max_bytes)
+
+
+def stream_completed(executor, items, func, max_in_flight):
+    """Submit func(index, item) for each item and yield results as they finish
+
+    At most max_in_flight items are submitted at once, so inputs are pulled
+    from the items iterator only as fast as they are processed.
+    """
+    in_flight = set()
+    for index, item in enumerate(items):
+        in_flight.add(executor.submit(func, index, item))
+        if len(in_flight) >= max_in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    while in_flight:
+        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
@@ -0,0 +1,132 @@
+import logging
+import queue
+import threading
+import time
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class _PendingItem:
+    __slots__ = ('item', 'key', 'enqueued_at', 'done', 'result', 'error')
+
+    def __init__(self, item, key):
+        self.item = item
+        self.key = key
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Collects items from concurrent callers and runs them through one batched call
+
+    A single worker thread owns the wrapped model: it takes the oldest queued
+    item, waits up to ``max_wait_ms`` (measured from when that item was queued)
+    for more items with the same key, then calls ``run_batch(items, key)`` once
+    and hands each caller its own entry of the returned list. The thread starts on
+    the first submit, so a batcher created before a fork works in the child.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=5.0, name='batch'):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._carry = []
+        self._batch_size = registry.histogram(
+            f'{name}_batch_size', 'Number of frames per batched forward pass', BATCH_SIZE_BUCKETS
+        )
+        self._queue_wait = registry.histogram(
+            f'{name}_batch_queue_wait_ms', 'Time a frame waited in the batching queue (ms)'
+        )
+        registry.gauge(
+            f'{name}_batch_queue_depth', 'Frames waiting in the batching queue'
+        ).track(self.qsize)
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def submit(self, item, key=None):
+        """Queue one item and block until its result is ready"""
+        return self.submit_many([item], key=key)[0]
+
+    def submit_many(self, items, key=None):
+        """Queue several items at once and block until all results are ready"""
+        self._ensure_worker()
+        pending = [_PendingItem(item, key) for item in items]
+        for entry in pending:
+            self._queue.put(entry)
+        results = []
+        for entry in pending:
+            entry.done.wait()
+            if entry.error is not None:
+                raise entry.error
+            results.append(entry.result)
+        return results
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=f'{self.name}-batcher', daemon=True)
+                self._worker.start()
+
+    def qsize(self):
+        return self._queue.qsize() + len(self._carry)
+
+    def _next(self, timeout=None):
+        if self._carry:
+            return self._carry.pop(0)
+        if timeout is None:
+            return self._queue.get()
+        if timeout <= 0:
+            return self._queue.get_nowait()
+        return self._queue.get(timeout=timeout)
+
+    def _collect(self):
+        first = self._next()
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        skipped = []
+        while len(batch) < self.max_batch_size:
+            try:
+                entry = self._next(deadline - time.perf_counter())
+            except queue.Empty:
+                break
+            if entry.key == first.key:
+                batch.append(entry)
+            else:
+                skipped.append(entry)
+        # Items with a different key keep their place for the next round
+        self._carry = skipped + self._carry
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            for entry in batch:
+                self._queue_wait.observe((started - entry.enqueued_at) * 1000)
+            self._batch_size.observe(len(batch))
+
+            try:
+                results = self.run_batch([entry.item for entry in batch], batch[0].key)
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"{self.name} batch returned {len(results)} results for {len(batch)} inputs"
+                    )
+                for entry, result in zip(batch, results):
+                    entry.result = result
+            except Exception as e:
+                logger.error(f"{self.name} batch of {len(batch)} failed: {e}")
+                for entry in batch:
+                    entry.error = e
+            finally:
+                for entry in batch:
+                    entry.done.set()
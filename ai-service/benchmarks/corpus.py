@@ -0,0 +1,104 @@
+"""Fixed benchmark corpus of synthetic and real images
+
+Synthetic images are generated from a seed, so every run sees the same
+pixels. Real images come from a local folder; each one is also tiled side
+by side to get scenes with more faces and people in them.
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import IMAGE_EXTENSIONS  # noqa: E402
+
+SYNTHETIC_SIZES = ((320, 240), (640, 480), (1280, 720), (1920, 1080), (3840, 2160))
+SYNTHETIC_FIGURES = (0, 1, 4)
+REAL_COPIES = (1, 2, 4)
+REAL_MAX_SIDE = 1920
+JPEG_QUALITY = 90
+
+
+class CorpusImage:
+    """One encoded benchmark image and what it contains
+
+    ``figures`` is the number of drawn figures in a synthetic image, or the
+    number of tiled copies of the source scene in a real one.
+    """
+
+    def __init__(self, name, image, kind, figures):
+        self.name = name
+        self.kind = kind
+        self.figures = figures
+        self.height, self.width = image.shape[:2]
+        ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        if not ok:
+            raise ValueError(f"Could not encode {name}")
+        self.data = encoded.tobytes()
+        self.image = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+    def describe(self):
+        return {
+            'kind': self.kind,
+            'width': self.width,
+            'height': self.height,
+            'figures': self.figures,
+            'bytes': len(self.data)
+        }
+
+
+def synthetic_image(width, height, figures, seed=0):
+    """Textured background with simple head-and-body figures drawn on it"""
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(40, 200, width, dtype=np.float32)[None, :, None]
+    image = np.broadcast_to(gradient, (height, width, 3)).copy()
+    image += rng.normal(0, 12, size=(height, width, 3)).astype(np.float32)
+
+    for _ in range(8):
+        x, y = rng.integers(0, width), rng.integers(0, height)
+        w, h = rng.integers(width // 20 + 1, width // 5 + 2), rng.integers(height // 20 + 1, height // 5 + 2)
+        cv2.rectangle(image, (int(x), int(y)), (int(x + w), int(y + h)), rng.integers(0, 255, 3).tolist(), -1)
+
+    for i in range(figures):
+        cx = int((i + 0.5) * width / figures)
+        scale = height / 3
+        skin = (120, 160, 210)
+        cv2.ellipse(image, (cx, int(scale * 0.7)), (int(scale * 0.18), int(scale * 0.24)), 0, 0, 360, skin, -1)
+        cv2.circle(image, (cx - int(scale * 0.07), int(scale * 0.65)), max(1, int(scale * 0.03)), (40, 40, 40), -1)
+        cv2.circle(image, (cx + int(scale * 0.07), int(scale * 0.65)), max(1, int(scale * 0.03)), (40, 40, 40), -1)
+        cv2.rectangle(
+            image, (cx - int(scale * 0.3), int(scale * 1.0)), (cx + int(scale * 0.3), int(scale * 2.2)),
+            (90, 60, 30), -1
+        )
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def tiled(image, copies):
+    """copies of image side by side, as in a wide multi-person scene"""
+    return np.hstack([image] * copies) if copies > 1 else image
+
+
+def build_corpus(real_dir=None, sizes=SYNTHETIC_SIZES, figures=SYNTHETIC_FIGURES, copies=REAL_COPIES):
+    """All benchmark images, synthetic first, in a stable order"""
+    corpus = []
+    for width, height in sizes:
+        for count in figures:
+            image = synthetic_image(width, height, count, seed=width * 10 + count)
+            corpus.append(CorpusImage(f'synthetic_{width}x{height}_f{count}', image, 'synthetic', count))
+
+    if real_dir:
+        for name in sorted(os.listdir(real_dir)):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            image = cv2.imread(os.path.join(real_dir, name))
+            if image is None:
+                continue
+            ratio = REAL_MAX_SIDE / max(image.shape[:2])
+            if ratio < 1:
+                image = cv2.resize(image, None, fx=ratio, fy=ratio, interpolation=cv2.INTER_AREA)
+            stem = os.path.splitext(name)[0]
+            for count in copies:
+                corpus.append(CorpusImage(f'{stem}_x{count}', tiled(image, count), 'real', count))
+    return corpus
@@ -0,0 +1,264 @@
+"""Benchmark the detection pipeline and compare against a saved baseline
+
+Runs in-process over the fixed corpus from corpus.py:
+
+* detector scenarios call AIDetectionService.run_detection directly with
+  one detector at a time and record its latency on each image;
+* endpoint scenarios post every image to /api/detect through the Flask
+  test client, once per detection_type, with the result cache disabled.
+
+Each scenario reports throughput, p50/p95/p99 latency and the peak RSS of
+the whole process while it ran. Models stay loaded once used, so the RSS
+of a scenario includes the models of the scenarios before it. With
+--baseline, results are compared against a
+saved run and the exit status is non-zero when any gated metric regressed
+by more than --threshold.
+
+    python benchmarks/run.py --images path/to/photos --save benchmarks/baselines/local.json
+    python benchmarks/run.py --images path/to/photos --baseline benchmarks/baselines/local.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Every request must run the detectors, not hit the result cache
+os.environ['RESULT_CACHE_MAX_MB'] = '0'
+os.environ['RESULT_CACHE_DIR'] = ''
+
+from corpus import build_corpus  # noqa: E402
+
+DETECTION_TYPES = ('face', 'body', 'object', 'all')
+# Each detector and the detection_type that runs it alone
+DETECTORS = {'faces': 'face', 'bodyParts': 'body', 'objects': 'object'}
+# Metrics compared against the baseline, and whether higher is better
+GATED_METRICS = {'p50Ms': False, 'p95Ms': False, 'throughput': True}
+
+
+class RssSampler:
+    """Tracks the peak resident set size of this process while active"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def current():
+        try:
+            with open('/proc/self/statm', 'r') as handle:
+                return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, AttributeError):
+            pass
+        try:
+            import resource
+        except ImportError:
+            # Windows has neither /proc nor resource; RSS is reported as 0
+            return 0
+        # Peak of the whole process where /proc is not available (KB on Linux, bytes on macOS)
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == 'darwin' else usage * 1024
+
+    def __enter__(self):
+        self.peak = self.current()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+
+def summarize(latencies_ms, wall_seconds, peak_rss):
+    latencies = np.array(latencies_ms, dtype=np.float64)
+    return {
+        'samples': int(len(latencies)),
+        'throughput': round(len(latencies) / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        'p50Ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95Ms': round(float(np.percentile(latencies, 95)), 2),
+        'p99Ms': round(float(np.percentile(latencies, 99)), 2),
+        'meanMs': round(float(latencies.mean()), 2),
+        'peakRssMb': round(peak_rss / (1024 * 1024), 1)
+    }
+
+
+def bench_detectors(app, corpus, iterations, warmup, tier):
+    """Latency and throughput of each detector on each image, one detector per run
+
+    Latency is the detector's own time; throughput counts whole
+    run_detection calls, so frame conversion and resizing are included.
+    """
+    service = app._primary_service
+    scenarios = {}
+    for detector, detection_type in DETECTORS.items():
+        if detector not in app.ENABLED_DETECTORS:
+            continue
+        for image in corpus:
+            for _ in range(warmup):
+                service.run_detection(app.Frame(image.image), detection_type, parallel=False, tier=tier)
+
+            latencies = []
+            with RssSampler() as rss:
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    # A fresh Frame each time, so color conversion and resizing are included
+                    results = service.run_detection(app.Frame(image.image), detection_type, parallel=False, tier=tier)
+                    latencies.append(results['timings'][detector])
+                wall = time.perf_counter() - started
+            scenarios[f'detector/{detector}/{image.name}'] = summarize(latencies, wall, rss.peak)
+    return scenarios
+
+
+def bench_endpoints(app, corpus, iterations, warmup, tier, concurrency):
+    """End-to-end /api/detect latency per detection_type over the whole corpus"""
+    client = app.app.test_client()
+
+    def post(image, detection_type):
+        started = time.perf_counter()
+        response = client.post('/api/detect', data={
+            'file': (BytesIO(image.data), f'{image.name}.jpg'),
+            'detection_type': detection_type,
+            'tier': tier
+        }, content_type='multipart/form-data')
+        elapsed = (time.perf_counter() - started) * 1000
+        ok = response.status_code == 200
+        response.close()
+        if not ok:
+            raise RuntimeError(f"/api/detect returned {response.status_code} for {image.name}")
+        return elapsed
+
+    scenarios = {}
+    for detection_type in DETECTION_TYPES:
+        for image in corpus[:warmup]:
+            post(image, detection_type)
+
+        jobs = [image for _ in range(iterations) for image in corpus]
+        with RssSampler() as rss:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                latencies = list(executor.map(lambda image: post(image, detection_type), jobs))
+            wall = time.perf_counter() - started
+        scenarios[f'endpoint/{detection_type}'] = summarize(latencies, wall, rss.peak)
+
+        # Requests of different kinds were interleaved, so a kind's throughput
+        # is estimated from its own latencies rather than measured
+        for kind in sorted({image.kind for image in corpus}):
+            kind_latencies = [latency for image, latency in zip(jobs, latencies) if image.kind == kind]
+            scenarios[f'endpoint/{detection_type}/{kind}'] = summarize(
+                kind_latencies, sum(kind_latencies) / 1000 / concurrency, rss.peak
+            )
+    return scenarios
+
+
+def compare(results, baseline, threshold):
+    """Regressions of gated metrics beyond threshold, as printable lines"""
+    regressions = []
+    for key, current in sorted(results['scenarios'].items()):
+        previous = baseline['scenarios'].get(key)
+        if previous is None:
+            continue
+        for metric, higher_is_better in GATED_METRICS.items():
+            before, after = previous.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if (change < -threshold) if higher_is_better else (change > threshold):
+                regressions.append(f"{key} {metric}: {before} -> {after} ({change:+.1%})")
+    return regressions
+
+
+def print_table(scenarios):
+    print(f"{'scenario':<60} {'n':>5} {'thru/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'rssMB':>7}")
+    for key, stats in sorted(scenarios.items()):
+        print(
+            f"{key:<60} {stats['samples']:>5} {stats['throughput']:>8} {stats['p50Ms']:>9} "
+            f"{stats['p95Ms']:>9} {stats['p99Ms']:>9} {stats['peakRssMb']:>7}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--images', help='folder of real images to add to the synthetic corpus')
+    parser.add_argument('--iterations', type=int, default=3, help='passes over the corpus per scenario')
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--tier', default='balanced')
+    parser.add_argument('--concurrency', type=int, default=1, help='concurrent endpoint requests')
+    parser.add_argument('--skip-detectors', action='store_true')
+    parser.add_argument('--skip-endpoints', action='store_true')
+    parser.add_argument('--save', help='write the results to this JSON file, e.g. as a new baseline')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.15, help='allowed relative regression')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.images)
+    if not args.images:
+        print("No --images folder given, benchmarking the synthetic corpus only")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        # Aggregate scenarios are only comparable over the same images and settings
+        if set(baseline['corpus']) != {image.name for image in corpus} or (
+            baseline['settings'].get('tier'), baseline['settings'].get('concurrency')
+        ) != (args.tier, args.concurrency):
+            print(f"{args.baseline} was recorded with a different corpus, tier or concurrency")
+            sys.exit(2)
+
+    import app
+
+    scenarios = {}
+    if not args.skip_detectors:
+        scenarios.update(bench_detectors(app, corpus, args.iterations, args.warmup, args.tier))
+    if not args.skip_endpoints:
+        scenarios.update(bench_endpoints(app, corpus, args.iterations, args.warmup, args.tier, args.concurrency))
+
+    results = {
+        'createdAt': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'settings': {
+            'iterations': args.iterations,
+            'tier': args.tier,
+            'concurrency': args.concurrency,
+            'resultsConfig': app.RESULTS_CONFIG
+        },
+        'corpus': {image.name: image.describe() for image in corpus},
+        'scenarios': scenarios
+    }
+    print_table(scenarios)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+        print(f"Saved results to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions beyond {args.threshold:.0%} against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
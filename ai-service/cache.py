@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+def image_cache_key(image, *parts):
+    """Content hash of a decoded image plus the settings that shape its results"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr((image.shape, str(image.dtype))).encode())
+    digest.update(memoryview(image if image.flags['C_CONTIGUOUS'] else image.copy()))
+    for part in parts:
+        digest.update(b'\0')
+        digest.update(json.dumps(part, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Content-addressed detection result cache
+
+    Results are kept as JSON in an in-memory LRU tier bounded by total
+    size, and optionally in an on-disk tier (one file per key) so they
+    survive restarts and can be shared by worker processes. Every ``get``
+    returns a fresh copy, so callers may modify what they receive.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None, disk_max_entries=10000):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_entries = disk_max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._disk_writes = 0
+        self._pruner = None
+        self._lookups = registry.counter('result_cache_lookups_total', 'Result cache lookups by tier and outcome')
+        self._size = registry.gauge('result_cache_memory_bytes', 'Bytes held by the in-memory result cache')
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0 or bool(self.disk_dir)
+
+    def get(self, key):
+        """Cached results for key, or None"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+        if payload is not None:
+            self._lookups.inc(tier='memory', result='hit')
+            return json.loads(payload)
+        self._lookups.inc(tier='memory', result='miss')
+
+        if self.disk_dir:
+            payload = self._read_disk(key)
+            if payload is not None:
+                self._lookups.inc(tier='disk', result='hit')
+                self._remember(key, payload)
+                return json.loads(payload)
+            self._lookups.inc(tier='disk', result='miss')
+        return None
+
+    def put(self, key, results):
+        """Store results for key in every enabled tier"""
+        payload = json.dumps(results)
+        self._remember(key, payload)
+        if self.disk_dir:
+            self._write_disk(key, payload)
+
+    def _remember(self, key, payload):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = payload
+            self._bytes += len(payload)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+            self._size.set(self._bytes)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f'{key}.json')
+
+    def _read_disk(self, key):
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as handle:
+                return handle.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Result cache read error: {e}")
+            return None
+
+    def _write_disk(self, key, payload):
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as handle:
+                handle.write(payload)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Result cache write error: {e}")
+            return
+
+        # Walking the directory is slow on a large tier, so it never runs on
+        # the request thread, and only one walk is in progress at a time
+        with self._lock:
+            self._disk_writes += 1
+            if self._disk_writes % 100 == 0 and (self._pruner is None or not self._pruner.is_alive()):
+                self._pruner = threading.Thread(target=self._prune_disk, name='result-cache-prune', daemon=True)
+                self._pruner.start()
+
+    def _prune_disk(self):
+        """Drop the oldest files once the disk tier holds too many entries"""
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    try:
+                        files.append((os.path.getmtime(path), path))
+                    except OSError:
+                        continue
+        excess = len(files) - self.disk_max_entries
+        if excess <= 0:
+            return
+        for _, path in sorted(files)[:excess]:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
@@ -0,0 +1,45 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def env_int(name, default):
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    if value is None or value.strip() == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"Invalid integer for {name}: {value!r}, using {default}")
+        return default
+
+
+def env_float(name, default):
+    """Read a float setting from the environment"""
+    value = os.getenv(name)
+    if value is None or value.strip() == '':
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Invalid number for {name}: {value!r}, using {default}")
+        return default
+
+
+def parse_bool(value, default=False):
+    """Interpret a form, query or JSON value as a boolean"""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value == '':
+        return default
+    return value in ('1', 'true', 'yes', 'on')
+
+
+def env_bool(name, default):
+    """Read a boolean setting from the environment"""
+    return parse_bool(os.getenv(name), default)
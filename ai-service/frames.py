@@ -0,0 +1,129 @@
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from metrics import stage_latency
+
+# Maps pixel coordinates of a frame back onto the original image:
+# x_original = x * fx + ox, y_original = y * fy + oy
+IDENTITY_TRANSFORM = (1.0, 1.0, 0, 0)
+
+_REDUCED_DECODE_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+def _image_header(buffer):
+    """Format and (width, height) read from the image header without decoding pixels"""
+    try:
+        with Image.open(BytesIO(buffer)) as image:
+            return image.format, image.size
+    except Exception:
+        return None, None
+
+
+def decode_image(buffer, max_side=None):
+    """Decode an encoded image, letting libjpeg shrink large JPEGs while decoding
+
+    Returns the BGR image and the (width, height) of the full-resolution
+    image. When max_side is set and the JPEG is at least twice that size,
+    it is decoded at 1/2, 1/4 or 1/8 scale, never below max_side.
+    """
+    array = np.frombuffer(buffer, np.uint8)
+    image_format, size = _image_header(buffer)
+
+    flag = cv2.IMREAD_COLOR
+    if max_side and image_format == 'JPEG' and size:
+        longest = max(size)
+        for factor, reduced_flag in _REDUCED_DECODE_FLAGS:
+            if longest // factor >= max_side:
+                flag = reduced_flag
+                break
+
+    image = cv2.imdecode(array, flag)
+    if image is None:
+        return None, None
+    if size is None:
+        size = (image.shape[1], image.shape[0])
+    elif (image.shape[1] > image.shape[0]) != (size[0] > size[1]):
+        # The decoder applied an EXIF rotation the header size doesn't reflect
+        size = (size[1], size[0])
+    return image, size
+
+
+def scale_transform(transform, fx, fy):
+    """Compose a transform with a scale applied before it"""
+    tfx, tfy, ox, oy = transform
+    return (tfx * fx, tfy * fy, ox, oy)
+
+
+class Frame:
+    """A decoded image with lazily built color and resolution views
+
+    The RGB conversion and each downscaled copy are made at most once per
+    frame and shared by every detector that needs them. ``transform`` maps
+    this frame's pixel coordinates onto the original image.
+    """
+
+    def __init__(self, bgr, rgb=None, original_size=None, transform=None):
+        self.bgr = bgr
+        self._rgb = rgb
+        height, width = bgr.shape[:2]
+        if transform is None:
+            if original_size is not None and tuple(original_size) != (width, height):
+                transform = (original_size[0] / width, original_size[1] / height, 0, 0)
+            else:
+                transform = IDENTITY_TRANSFORM
+        self.transform = transform
+        self._views = {}
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+    @property
+    def original_size(self):
+        """(width, height) of the original image this frame maps onto"""
+        fx, fy, ox, oy = self.transform
+        height, width = self.bgr.shape[:2]
+        return (round(width * fx + ox), round(height * fy + oy))
+
+    @property
+    def rgb(self):
+        if self._rgb is None:
+            with stage_latency.timer(stage='color_conversion'):
+                self._rgb = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
+        return self._rgb
+
+    def view(self, max_side=None):
+        """This frame downscaled so its longest side is at most max_side"""
+        height, width = self.bgr.shape[:2]
+        if not max_side or max(width, height) <= max_side:
+            return self
+
+        view = self._views.get(max_side)
+        if view is None:
+            ratio = max_side / float(max(width, height))
+            size = (max(1, round(width * ratio)), max(1, round(height * ratio)))
+            with stage_latency.timer(stage='resize'):
+                bgr = cv2.resize(self.bgr, size, interpolation=cv2.INTER_AREA)
+                rgb = None
+                if self._rgb is not None:
+                    rgb = cv2.resize(self._rgb, size, interpolation=cv2.INTER_AREA)
+            transform = scale_transform(self.transform, width / size[0], height / size[1])
+            view = Frame(bgr, rgb=rgb, transform=transform)
+            self._views[max_side] = view
+        return view
+
+    def crop(self, box):
+        """The part of this frame inside box, given as (x1, y1, x2, y2) in original image coordinates"""
+        fx, fy, ox, oy = self.transform
+        height, width = self.bgr.shape[:2]
+        x1 = min(max(int((box[0] - ox) / fx), 0), width)
+        y1 = min(max(int((box[1] - oy) / fy), 0), height)
+        x2 = min(max(int(np.ceil((box[2] - ox) / fx)), x1), width)
+        y2 = min(max(int(np.ceil((box[3] - oy) / fy)), y1), height)
+        # MediaPipe needs contiguous buffers, and only the crop is converted to RGB
+        bgr = np.ascontiguousarray(self.bgr[y1:y2, x1:x2])
+        rgb = np.ascontiguousarray(self._rgb[y1:y2, x1:x2]) if self._rgb is not None else None
+        return Frame(bgr, rgb=rgb, transform=(fx, fy, x1 * fx + ox, y1 * fy + oy))
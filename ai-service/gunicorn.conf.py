@@ -0,0 +1,55 @@
+"""Gunicorn settings for the AI service, overridable through environment variables
+
+Workers are separate processes, each with its own detector pool, so CPU
+bound MediaPipe/YOLO work is not serialized by one GIL. The app module is
+preloaded in the master: imports are paid once and shared copy-on-write,
+while models are loaded lazily inside each worker after the fork, because
+MediaPipe graphs and inference runtimes start threads that do not survive
+fork. Workers are recycled after a jittered number of requests to cap the
+native memory MediaPipe accumulates over time.
+"""
+import os
+
+from config import env_int
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+
+# Requests admitted into the app at once per worker, and how many more may
+# wait for a slot before being shed with a 503; the extra threads keep
+# /api/health and /metrics responsive and let shed requests be answered.
+# The parsed values are written back so the app uses the same limits.
+max_active_requests = env_int('MAX_ACTIVE_REQUESTS', 4)
+max_queued_requests = env_int('MAX_QUEUED_REQUESTS', 8)
+os.environ['MAX_ACTIVE_REQUESTS'] = str(max_active_requests)
+os.environ['MAX_QUEUED_REQUESTS'] = str(max_queued_requests)
+threads = env_int('GUNICORN_THREADS', max_active_requests + max_queued_requests + 2)
+
+# Pending connections the kernel holds for the whole server
+backlog = int(os.getenv('GUNICORN_BACKLOG', '128'))
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes', 'on')
+
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+# Video and batch responses stream for a long time
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '300'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '60'))
+keepalive = 5
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+
+def post_worker_init(worker):
+    """Label this worker's metrics and start the optional model warm-up"""
+    from app import start_warmup
+    from metrics import registry
+
+    # Every worker keeps its own metrics and a scrape reaches one of them, so
+    # series are labelled per worker instead of looking like counter resets
+    registry.set_constant_labels(worker=str(worker.pid))
+    start_warmup()
@@ -0,0 +1,257 @@
+import ipaddress
+import itertools
+import logging
+import queue
+import socket
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import registry
+from pool import PoolExhausted
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first; jobs of the same priority run in submission order
+JOB_PRIORITIES = {'realtime': 0, 'interactive': 1, 'bulk': 2}
+DEFAULT_JOB_PRIORITY = 'interactive'
+FINISHED_STATES = ('completed', 'failed', 'cancelled')
+
+
+def resolve_callback(url, allowed_hosts=()):
+    """Address job results for url are POSTed to, or None if url is not allowed
+
+    With allowed_hosts, only those hosts are accepted. Otherwise the host
+    must resolve to public addresses only, so callbacks cannot reach
+    loopback, private, link-local (cloud metadata) or other internal
+    addresses. The callback is later sent to the returned address itself,
+    so a DNS answer that changes after this check cannot redirect it.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        return None
+    hostname = parsed.hostname.lower()
+    if allowed_hosts and hostname not in allowed_hosts:
+        return None
+    try:
+        addresses = [info[4][0].split('%')[0] for info in socket.getaddrinfo(hostname, parsed.port or None)]
+    except (socket.gaierror, UnicodeError, ValueError):
+        return None
+    if not addresses:
+        return None
+    if not allowed_hosts and not all(ipaddress.ip_address(address).is_global for address in addresses):
+        return None
+    return addresses[0]
+
+
+class _PinnedHostAdapter(HTTPAdapter):
+    """HTTPS adapter for URLs rewritten to an address: TLS still checks the original host name"""
+
+    def __init__(self, hostname):
+        self.hostname = hostname
+        super().__init__()
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.update(server_hostname=self.hostname, assert_hostname=self.hostname)
+        super().init_poolmanager(*args, **kwargs)
+
+
+def post_to_address(url, address, payload, timeout):
+    """POST payload as JSON to url, connecting to address instead of resolving the host again"""
+    parsed = urlparse(url)
+    host = f'[{address}]' if ':' in address else address
+    port = f':{parsed.port}' if parsed.port else ''
+    pinned_url = parsed._replace(netloc=f'{host}{port}').geturl()
+    with requests.Session() as session:
+        if parsed.scheme == 'https':
+            session.mount('https://', _PinnedHostAdapter(parsed.hostname))
+        return session.post(
+            pinned_url, json=payload, timeout=timeout, allow_redirects=False,
+            headers={'Host': f'{parsed.hostname}{port}'}
+        )
+
+
+class JobQueueFull(PoolExhausted):
+    """Raised when a job is submitted while the queue holds its maximum of pending jobs"""
+
+
+class Job:
+    """One asynchronous detection request and, once it has run, its outcome"""
+
+    def __init__(self, payload, priority=DEFAULT_JOB_PRIORITY, callback_url=None, callback_address=None):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.priority = priority
+        self.callback_url = callback_url
+        self.callback_address = callback_address
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.results = None
+        self.error = None
+        self.callback_error = None
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def to_dict(self):
+        job = {
+            'jobId': self.id,
+            'status': self.status,
+            'priority': self.priority,
+            'createdAt': self.created_at,
+            'startedAt': self.started_at,
+            'finishedAt': self.finished_at
+        }
+        if self.results is not None:
+            job['results'] = self.results
+        if self.error is not None:
+            job['error'] = self.error
+        if self.callback_url:
+            job['callbackUrl'] = self.callback_url
+            if self.callback_error is not None:
+                job['callbackError'] = self.callback_error
+        return job
+
+
+class JobQueue:
+    """In-process priority queue of detection jobs run by a fixed set of worker threads
+
+    ``handler(payload)`` runs each job and returns its results. At most
+    ``max_queued`` jobs wait at a time, beyond which ``JobQueueFull`` is
+    raised. Finished jobs, with their results, are kept for ``result_ttl``
+    seconds for polling, and are also POSTed as JSON to the job's callback
+    URL if it has one, at the address ``resolve_callback`` vetted when the
+    job was submitted.
+    Workers start with the first job, so a queue created before a fork
+    works in the child.
+    """
+
+    def __init__(self, handler, workers=2, max_queued=100, result_ttl=600.0, callback_timeout=10.0,
+                 callback_hosts=()):
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.max_queued = max(1, int(max_queued))
+        self.result_ttl = result_ttl
+        self.callback_timeout = callback_timeout
+        self.callback_hosts = frozenset(callback_hosts)
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._queued = 0
+        self._running = 0
+        self._threads = []
+        self._finished = registry.counter('jobs_finished_total', 'Detection jobs finished, by final status')
+        self._wait_time = registry.histogram('job_queue_wait_ms', 'Time a job waited before a worker picked it up (ms)')
+        registry.gauge('jobs_queued', 'Detection jobs waiting for a worker').track(lambda: self._queued)
+        registry.gauge('jobs_running', 'Detection jobs being processed').track(lambda: self._running)
+
+    def submit(self, payload, priority=DEFAULT_JOB_PRIORITY, callback_url=None):
+        """Queue a job and return it straight away
+
+        Raises ValueError for an unknown priority or a callback URL that is
+        not allowed.
+        """
+        if priority not in JOB_PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        callback_address = None
+        if callback_url:
+            callback_address = resolve_callback(callback_url, self.callback_hosts)
+            if callback_address is None:
+                raise ValueError("Invalid or disallowed callback_url")
+        job = Job(payload, priority, callback_url, callback_address)
+        with self._lock:
+            self._expire_locked()
+            if self._queued >= self.max_queued:
+                raise JobQueueFull(f"{self.max_queued} jobs are already waiting, try again later")
+            self._ensure_workers_locked()
+            self._jobs[job.id] = job
+            self._queued += 1
+        self._queue.put((JOB_PRIORITIES[priority], next(self._order), job))
+        return job
+
+    def get(self, job_id):
+        """The job with job_id, or None if it does not exist or has expired"""
+        with self._lock:
+            self._expire_locked()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a job that has not finished yet
+
+        Returns the job, or None if unknown, and whether this call cancelled
+        it. Queued jobs never run. A running detection cannot be
+        interrupted, so its results are discarded once it completes.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return job, False
+            if job.status == 'queued':
+                self._queued -= 1
+                job.payload = None
+            self._finish_locked(job, 'cancelled')
+        logger.info(f"🛑 Cancelled job {job.id}")
+        return job, True
+
+    def _ensure_workers_locked(self):
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run, name=f'job-{len(self._threads)}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _finish_locked(self, job, status):
+        job.status = status
+        job.finished_at = time.time()
+        self._finished.inc(status=status)
+
+    def _expire_locked(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _run(self):
+        while True:
+            _, _, job = self._queue.get()
+            with self._lock:
+                # Cancelled while it was waiting
+                if job.status != 'queued':
+                    continue
+                self._queued -= 1
+                self._running += 1
+                job.status = 'running'
+                job.started_at = time.time()
+                payload, job.payload = job.payload, None
+            self._wait_time.observe((job.started_at - job.created_at) * 1000, priority=job.priority)
+
+            results, error = None, None
+            try:
+                results = self.handler(payload)
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}")
+                error = str(e)
+
+            with self._lock:
+                self._running -= 1
+                if job.status == 'running':
+                    job.results, job.error = results, error
+                    self._finish_locked(job, 'failed' if error is not None else 'completed')
+            if job.callback_url:
+                self._send_callback(job)
+
+    def _send_callback(self, job):
+        try:
+            response = post_to_address(job.callback_url, job.callback_address, job.to_dict(), self.callback_timeout)
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Callback for job {job.id} to {job.callback_url} failed: {e}")
+            job.callback_error = str(e)
@@ -0,0 +1,58 @@
+import threading
+
+from metrics import registry
+from pool import PoolExhausted
+
+
+class Overloaded(PoolExhausted):
+    """Raised when a request is shed because the service is already saturated"""
+
+
+class RequestLimiter:
+    """Caps the requests being processed and the requests queued behind them
+
+    Up to ``max_active`` requests run at once and up to ``max_queued`` more
+    wait at most ``queue_timeout`` seconds for a slot. Requests beyond that
+    are rejected at once with ``Overloaded``, which the app turns into a
+    503, instead of piling up until clients time out.
+    """
+
+    def __init__(self, max_active=0, max_queued=0, queue_timeout=5.0):
+        self.max_active = max(0, int(max_active))
+        self.max_queued = max(0, int(max_queued))
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self._active = 0
+        self._queued = 0
+        self._shed = registry.counter('requests_shed_total', 'Requests rejected by the admission limiter')
+        registry.gauge('requests_active', 'Requests holding an admission slot').track(lambda: self._active)
+        registry.gauge('requests_queued', 'Requests waiting for an admission slot').track(lambda: self._queued)
+
+    @property
+    def enabled(self):
+        return self.max_active > 0
+
+    def acquire(self):
+        """Take a slot, waiting in the bounded queue if all slots are busy"""
+        with self._condition:
+            if self._active < self.max_active:
+                self._active += 1
+                return
+            if self._queued >= self.max_queued:
+                self._shed.inc(reason='queue_full')
+                raise Overloaded("Server is overloaded, try again later")
+
+            self._queued += 1
+            try:
+                admitted = self._condition.wait_for(lambda: self._active < self.max_active, self.queue_timeout)
+            finally:
+                self._queued -= 1
+            if not admitted:
+                self._shed.inc(reason='timeout')
+                raise Overloaded("Server is overloaded, try again later")
+            self._active += 1
+
+    def release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify()
@@ -0,0 +1,191 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Default histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Histogram:
+    """Cumulative bucketed histogram, optionally split by labels"""
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS_MS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {'counts': [0] * len(self.buckets), 'count': 0, 'sum': 0.0}
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['count'] += 1
+            series['sum'] += value
+
+    @contextmanager
+    def timer(self, **labels):
+        """Observe the wall time of the enclosed block in milliseconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe((time.perf_counter() - started) * 1000, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {
+                    'labels': dict(key),
+                    'buckets': dict(zip(self.buckets, series['counts'])),
+                    'count': series['count'],
+                    'sum': series['sum']
+                }
+                for key, series in self._series.items()
+            ]
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def snapshot(self):
+        with self._lock:
+            return [{'labels': dict(key), 'value': value} for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, or is read from a callback when collected"""
+
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text)
+        self._callbacks = {}
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def track(self, func, **labels):
+        """Report func() as the value of this series whenever metrics are read"""
+        with self._lock:
+            self._callbacks[_label_key(labels)] = func
+
+    def snapshot(self):
+        series = super().snapshot()
+        with self._lock:
+            callbacks = list(self._callbacks.items())
+        return series + [{'labels': dict(key), 'value': func()} for key, func in callbacks]
+
+
+class MetricsRegistry:
+    """Process-wide collection of named metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._constant_labels = {}
+
+    def set_constant_labels(self, **labels):
+        """Labels added to every exported series, e.g. the serving process"""
+        with self._lock:
+            self._constant_labels = dict(labels)
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, *args, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS_MS):
+        return self._register(Histogram, name, help_text, buckets)
+
+    def counter(self, name, help_text):
+        return self._register(Counter, name, help_text)
+
+    def gauge(self, name, help_text):
+        return self._register(Gauge, name, help_text)
+
+    def snapshot(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {
+                'type': type(metric).__name__.lower(),
+                'help': metric.help,
+                'series': metric.snapshot()
+            }
+            for metric in metrics
+        }
+
+    def prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            constant_labels = dict(self._constant_labels)
+        lines = []
+        for name, metric in sorted(self.snapshot().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for series in metric['series']:
+                labels = {**constant_labels, **series['labels']}
+                if metric['type'] != 'histogram':
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(series['value'])}")
+                    continue
+                for bound, count in series['buckets'].items():
+                    lines.append(f"{name}_bucket{_format_labels(labels, le=bound)} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels, le='+Inf')} {series['count']}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(series['sum'])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {series['count']}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, **extra):
+    labels = dict(labels, **extra)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
+
+# Latency of each step of the detection pipeline, labelled by stage
+stage_latency = registry.histogram('detection_stage_ms', 'Time spent in each detection pipeline stage (ms)')
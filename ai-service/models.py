@@ -0,0 +1,71 @@
+import logging
+import threading
+import time
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_load_time = registry.histogram('model_load_ms', 'Time spent loading each model (ms)')
+
+
+class LazyModel:
+    """A model built by ``loader`` on first use
+
+    Loading happens at most once, under a lock, so concurrent first callers
+    wait for the same load. A failed load is logged and remembered, and
+    ``get`` then returns None like any other unavailable model.
+    """
+
+    def __init__(self, name, loader, enabled=True):
+        self.name = name
+        self.enabled = enabled
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._model = None
+        self.state = 'idle' if enabled else 'disabled'
+        self.load_ms = None
+        self.error = None
+
+    @property
+    def loaded(self):
+        return self.state == 'ready'
+
+    def get(self):
+        """The model, loading it first if needed; None when disabled or failed"""
+        if self.state == 'ready':
+            return self._model
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self.state == 'idle':
+                self._load()
+            return self._model
+
+    def peek(self):
+        """The model if it has been loaded, without loading it"""
+        return self._model
+
+    def status(self):
+        status = {'state': self.state}
+        if self.load_ms is not None:
+            status['loadMs'] = self.load_ms
+        if self.error:
+            status['error'] = self.error
+        return status
+
+    def _load(self):
+        self.state = 'loading'
+        started = time.perf_counter()
+        try:
+            model = self._loader()
+        except Exception as e:
+            logger.error(f"❌ Failed to load {self.name} model: {e}")
+            self.error = str(e)
+            self.state = 'failed'
+            return
+        self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+        _load_time.observe(self.load_ms, model=self.name)
+        self._model = model
+        self.state = 'ready'
+        logger.info(f"✅ Loaded {self.name} model in {self.load_ms}ms")
@@ -0,0 +1,116 @@
+import copy
+
+import cv2
+import numpy as np
+
+from metrics import registry
+
+# Width of the grayscale thumbnail frames are compared on
+GATE_WIDTH = 96
+# Minimum phase correlation peak for a measured shift to be trusted
+MIN_SHIFT_RESPONSE = 0.2
+
+_frames = registry.counter('realtime_gate_frames_total', 'Realtime session frames by motion gate outcome')
+
+
+def shift_results(results, dx, dy):
+    """A copy of detection results with every box and point moved by (dx, dy) pixels"""
+    shifted = copy.deepcopy(results)
+    if not dx and not dy:
+        return shifted
+    for key in ('faces', 'bodyParts', 'objects'):
+        for item in shifted[key]:
+            for point in (item['boundingBox'], *item.get('landmarks', ()), *item.get('keypoints', ())):
+                point['x'] = int(round(point['x'] + dx))
+                point['y'] = int(round(point['y'] + dy))
+    return shifted
+
+
+class MotionGate:
+    """Skips detection on stream frames that barely differ from the last detected one
+
+    Each frame is reduced to a small blurred grayscale thumbnail and
+    compared with the thumbnail of the last frame detection ran on: when
+    at most ``threshold`` of its pixels changed by more than
+    ``pixel_delta`` levels, the results of that frame are reused. With
+    ``track_shift``, a global shift measured by phase correlation is
+    compensated first, so a slowly panning camera reuses results moved by
+    the same amount. Detection always runs again after
+    ``keyframe_interval`` reused frames, or when the detection settings
+    change.
+    """
+
+    def __init__(self, threshold=0.01, pixel_delta=15, keyframe_interval=30, track_shift=False):
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self.track_shift = track_shift
+        self._reference = None
+        self._key = None
+        self._results = None
+        self._scale = (1.0, 1.0)
+        self._reused = 0
+        self._window = None
+        self._thumbnail = None
+        self._thumbnail_scale = None
+
+    def _make_thumbnail(self, bgr):
+        height, width = bgr.shape[:2]
+        size = (GATE_WIDTH, max(1, round(height * GATE_WIDTH / width)))
+        small = cv2.resize(bgr, size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (3, 3), 0).astype(np.float32), (width / size[0], height / size[1])
+
+    def _changed_fraction(self, a, b):
+        return np.count_nonzero(cv2.absdiff(a, b) > self.pixel_delta) / a.size
+
+    def reuse(self, bgr, key):
+        """Earlier results still valid for this frame, or None when detection must run
+
+        ``key`` identifies the detection settings the results depend on.
+        Call ``remember`` with the fresh results whenever None is returned.
+        """
+        self._thumbnail, self._thumbnail_scale = self._make_thumbnail(bgr)
+        if (
+            self._reference is None or key != self._key or self._thumbnail_scale != self._scale
+            or self._reused >= self.keyframe_interval
+        ):
+            return self._computed()
+
+        if self._changed_fraction(self._reference, self._thumbnail) <= self.threshold:
+            return self._gated(0.0, 0.0)
+
+        if self.track_shift:
+            if self._window is None or self._window.shape != self._thumbnail.shape:
+                self._window = cv2.createHanningWindow(self._thumbnail.shape[::-1], cv2.CV_32F)
+            (dx, dy), response = cv2.phaseCorrelate(self._reference, self._thumbnail, self._window)
+            if response >= MIN_SHIFT_RESPONSE:
+                moved = cv2.warpAffine(
+                    self._reference, np.float32([[1, 0, dx], [0, 1, dy]]), self._thumbnail.shape[::-1],
+                    borderMode=cv2.BORDER_REPLICATE
+                )
+                if self._changed_fraction(moved, self._thumbnail) <= self.threshold:
+                    return self._gated(dx * self._scale[0], dy * self._scale[1])
+        return self._computed()
+
+    def remember(self, key, results, bgr=None):
+        """Make results the new reference
+
+        They belong to the frame last passed to ``reuse``, or to ``bgr`` for a
+        frame detected without asking the gate first.
+        """
+        if bgr is not None:
+            self._thumbnail, self._thumbnail_scale = self._make_thumbnail(bgr)
+        self._reference, self._scale = self._thumbnail, self._thumbnail_scale
+        self._key = key
+        self._results = copy.deepcopy(results)
+        self._reused = 0
+
+    def _gated(self, dx, dy):
+        self._reused += 1
+        _frames.inc(outcome='gated')
+        return shift_results(self._results, dx, dy)
+
+    def _computed(self):
+        _frames.inc(outcome='computed')
+        return None
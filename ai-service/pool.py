@@ -0,0 +1,79 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhausted(Exception):
+    """Raised when no detector instance became free within the pool timeout"""
+
+
+class DetectorPool:
+    """Fixed-size pool of detector instances with check-out/check-in
+
+    Each instance is used by one request at a time. Callers that find the
+    pool empty wait up to ``timeout`` seconds before ``PoolExhausted`` is
+    raised, which the app turns into a 503.
+    """
+
+    def __init__(self, factory, size=2, timeout=10.0, initial=None):
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self._available = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._wait_time = registry.histogram(
+            'detector_pool_wait_ms', 'Time spent waiting for a free detector instance (ms)'
+        )
+        self._rejected = registry.counter(
+            'detector_pool_rejected_total', 'Requests rejected because the detector pool was exhausted'
+        )
+        registry.gauge('detector_pool_available', 'Detector instances free to take a request').track(self.available)
+        registry.gauge('detector_pool_waiting', 'Requests waiting for a free detector instance').track(self.waiting)
+
+        instances = list(initial or [])[:self.size]
+        while len(instances) < self.size:
+            instances.append(factory())
+        self.instances = tuple(instances)
+        for instance in instances:
+            self._available.put(instance)
+        logger.info(f"✅ Detector pool ready with {self.size} instances")
+
+    def available(self):
+        return self._available.qsize()
+
+    def waiting(self):
+        with self._lock:
+            return self._waiting
+
+    def acquire(self, timeout=None):
+        """Check out an instance, waiting up to ``timeout`` seconds"""
+        if timeout is None:
+            timeout = self.timeout
+        with self._lock:
+            self._waiting += 1
+        try:
+            with self._wait_time.timer():
+                return self._available.get(timeout=timeout)
+        except queue.Empty:
+            self._rejected.inc()
+            raise PoolExhausted(f"All {self.size} detector instances are busy, try again later")
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def release(self, instance):
+        """Return a checked-out instance to the pool"""
+        self._available.put(instance)
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        instance = self.acquire(timeout)
+        try:
+            yield instance
+        finally:
+            self.release(instance)
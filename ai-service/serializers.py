@@ -0,0 +1,126 @@
+"""Response encodings negotiated through the Accept header
+
+The default is the verbose JSON the API has always returned. Clients that
+ask for the compact layout get the same results with every list of dicts
+turned into columns: boxes, keypoints and emotions become flat number
+arrays, and the names that would repeat in every keypoint and emotion are
+published once in a versioned schema (GET /api/schema) instead. The
+compact layout is sent as JSON, or as MessagePack when the msgpack package
+is installed.
+"""
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+SCHEMA_VERSION = 1
+SCHEMA_HEADER = 'X-Result-Schema'
+
+JSON_MIMETYPE = 'application/json'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+COMPACT_MIMETYPE = 'application/vnd.ai-detection.compact+json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+
+def available_mimetypes():
+    """Response formats this process can produce, the default first"""
+    mimetypes = [JSON_MIMETYPE, COMPACT_MIMETYPE]
+    if msgpack is not None:
+        mimetypes.extend(MSGPACK_MIMETYPES)
+    return mimetypes
+
+
+def negotiate(accept_mimetypes):
+    """Best response format for a request's Accept header, JSON unless asked otherwise"""
+    return accept_mimetypes.best_match(available_mimetypes(), default=JSON_MIMETYPE)
+
+
+def stream_mimetype(mimetype):
+    """Content type of a streamed response whose items are encoded as mimetype"""
+    return NDJSON_MIMETYPE if mimetype in (JSON_MIMETYPE, COMPACT_MIMETYPE) else mimetype
+
+
+def schema_header():
+    return f'compact/{SCHEMA_VERSION}'
+
+
+def build_schema(pose_names, hand_names, face_landmark_names, emotion_names):
+    """Names and field order of the compact layout, published once per version"""
+    return {
+        'version': SCHEMA_VERSION,
+        'box': ['x', 'y', 'width', 'height'],
+        'faces': {
+            'columns': ['boxes', 'confidences', 'landmarks', 'emotions', 'age', 'gender'],
+            'landmark': ['x', 'y'],
+            'landmarkNames': list(face_landmark_names),
+            'emotionNames': list(emotion_names)
+        },
+        'bodyParts': {
+            'columns': ['names', 'boxes', 'confidences', 'keypoints'],
+            'keypoint': ['x', 'y', 'confidence'],
+            # Keypoints beyond a table are named landmark_<index>
+            'keypointNames': {
+                'full_body_pose': list(pose_names),
+                'hand': list(hand_names)
+            }
+        },
+        'objects': {
+            'columns': ['names', 'classIds', 'confidences', 'boxes']
+        }
+    }
+
+
+def _flat_box(box):
+    return [box['x'], box['y'], box['width'], box['height']]
+
+
+def compact_results(results, schema):
+    """The faces, bodyParts and objects of a results dict as columns"""
+    emotion_names = schema['faces']['emotionNames']
+    faces = results['faces']
+    body_parts = results['bodyParts']
+    objects = results['objects']
+
+    compact = {key: value for key, value in results.items() if key not in ('faces', 'bodyParts', 'objects')}
+    compact['faces'] = {
+        'boxes': [value for face in faces for value in _flat_box(face['boundingBox'])],
+        'confidences': [face['confidence'] for face in faces],
+        'landmarks': [[value for point in face['landmarks'] for value in (point['x'], point['y'])] for face in faces],
+        'emotions': [[face['emotions'][name] for name in emotion_names] for face in faces],
+        'age': [face['age'] for face in faces],
+        'gender': [face['gender'] for face in faces]
+    }
+    compact['bodyParts'] = {
+        'names': [part['name'] for part in body_parts],
+        'boxes': [value for part in body_parts for value in _flat_box(part['boundingBox'])],
+        'confidences': [part['confidence'] for part in body_parts],
+        'keypoints': [
+            [value for point in part['keypoints'] for value in (point['x'], point['y'], point['confidence'])]
+            for part in body_parts
+        ]
+    }
+    compact['objects'] = {
+        'names': [obj['name'] for obj in objects],
+        'classIds': [obj['class_id'] for obj in objects],
+        'confidences': [obj['confidence'] for obj in objects],
+        'boxes': [value for obj in objects for value in _flat_box(obj['boundingBox'])]
+    }
+    return compact
+
+
+def compact_payload(payload, schema):
+    """A response payload with its results, if any, in the compact layout"""
+    results = payload.get('results')
+    if not isinstance(results, dict) or 'faces' not in results:
+        return payload
+    return {**payload, 'results': compact_results(results, schema)}
+
+
+def encode(payload, mimetype, schema):
+    """Encode a response payload, or one streamed item, in a compact format"""
+    payload = compact_payload(payload, schema)
+    if mimetype == COMPACT_MIMETYPE:
+        return json.dumps(payload, separators=(',', ':'))
+    return msgpack.packb(payload, use_single_float=True)
@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import registry
+from pool import PoolExhausted
+
+logger = logging.getLogger(__name__)
+
+
+class StreamSession:
+    """Detector instance pinned to one realtime client stream, with its motion gate"""
+
+    def __init__(self, session_id, service, gate=None):
+        self.id = session_id
+        self.service = service
+        self.gate = gate
+        self.lock = threading.Lock()
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.frames = 0
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        self.service.close()
+
+
+class SessionManager:
+    """Keeps tracking-mode detectors alive per stream and evicts idle ones
+
+    Frames of one session are processed in order under the session lock,
+    which MediaPipe landmark tracking relies on. Sessions unused for
+    ``idle_timeout`` seconds are closed by a background sweeper, started
+    with the first session.
+    """
+
+    def __init__(self, factory, idle_timeout=60.0, max_sessions=8, gate_factory=None):
+        self.factory = factory
+        self.gate_factory = gate_factory
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max(1, int(max_sessions))
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._active = registry.gauge('realtime_sessions_active', 'Open realtime tracking sessions')
+        self._evicted = registry.counter('realtime_sessions_evicted_total', 'Realtime sessions closed for being idle')
+        self._sweeper = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    @contextmanager
+    def checkout(self, session_id):
+        """Yield the session for session_id, creating it on first use"""
+        while True:
+            session = self._get_or_create(session_id)
+            session.lock.acquire()
+            # The session may have been evicted while this request waited
+            if not session.closed:
+                break
+            session.lock.release()
+
+        try:
+            session.last_used = time.monotonic()
+            session.frames += 1
+            yield session
+        finally:
+            session.last_used = time.monotonic()
+            session.lock.release()
+
+    def close(self, session_id):
+        """Close a session explicitly, returns False when it does not exist"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        with session.lock:
+            session.close()
+        self._active.set(len(self))
+        return True
+
+    def _get_or_create(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                return session
+            if self._sweeper is None or not self._sweeper.is_alive():
+                self._sweeper = threading.Thread(target=self._sweep, name='session-sweeper', daemon=True)
+                self._sweeper.start()
+            # Only sessions idle for idle_timeout make room; active streams keep their state
+            if len(self._sessions) >= self.max_sessions:
+                self._evict_idle_locked()
+            if len(self._sessions) >= self.max_sessions:
+                raise PoolExhausted(f"All {self.max_sessions} realtime sessions are in use, try again later")
+            gate = self.gate_factory() if self.gate_factory is not None else None
+            session = StreamSession(session_id, self.factory(), gate)
+            self._sessions[session_id] = session
+            self._active.set(len(self._sessions))
+            logger.info(f"📡 Opened realtime session {session_id}")
+            return session
+
+    def _evict_idle_locked(self):
+        """Close sessions unused for at least idle_timeout seconds"""
+        now = time.monotonic()
+        idle = [s for s in self._sessions.values() if now - s.last_used >= self.idle_timeout]
+
+        for session in idle:
+            # Sessions in the middle of a frame are left alone
+            if not session.lock.acquire(blocking=False):
+                continue
+            try:
+                del self._sessions[session.id]
+                session.close()
+            finally:
+                session.lock.release()
+            self._evicted.inc()
+            logger.info(f"🧹 Closed idle realtime session {session.id} after {session.frames} frames")
+        self._active.set(len(self._sessions))
+
+    def _sweep(self):
+        interval = max(1.0, self.idle_timeout / 2)
+        while True:
+            time.sleep(interval)
+            try:
+                with self._lock:
+                    self._evict_idle_locked()
+            except Exception as e:
+                logger.error(f"Session sweep error: {e}")
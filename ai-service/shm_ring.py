@@ -0,0 +1,264 @@
+import atexit
+import itertools
+import logging
+import multiprocessing
+import queue
+import sys
+import threading
+import types
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from frames import decode_image
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class DecodedImage:
+    """A decoded BGR image and the (width, height) of the full-resolution original
+
+    When the image was decoded by a worker process, ``image`` is a view of
+    a shared memory slot: it is only valid until ``release`` is called,
+    after which the slot is reused for another image. Use it as a context
+    manager to release it when done.
+    """
+
+    __slots__ = ('image', 'original_size', '_release')
+
+    def __init__(self, image, original_size, release=None):
+        self.image = image
+        self.original_size = original_size
+        self._release = release
+
+    def release(self):
+        release, self._release = self._release, None
+        self.image = None
+        if release is not None:
+            release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class _PendingDecode:
+    __slots__ = ('slot', 'done', 'abandoned', 'shape', 'original_size', 'error')
+
+    def __init__(self, slot):
+        self.slot = slot
+        self.done = threading.Event()
+        self.abandoned = False
+        self.shape = None
+        self.original_size = None
+        self.error = None
+
+
+def _decode_worker(shm_name, slot_bytes, tasks, results):
+    """Worker process loop: decode each task's image into its shared memory slot"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            request_id, slot, buffer, max_side = task
+            try:
+                image, original_size = decode_image(buffer, max_side)
+                if image is None:
+                    results.put((request_id, None, None, 'invalid'))
+                elif image.nbytes > slot_bytes:
+                    results.put((request_id, None, None, 'too_large'))
+                else:
+                    target = np.ndarray(image.shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                    target[...] = image
+                    del target
+                    results.put((request_id, image.shape, original_size, None))
+            except Exception as e:
+                results.put((request_id, None, None, str(e)))
+    finally:
+        shm.close()
+
+
+class DecodeRing:
+    """Decodes images in worker processes into a ring of shared memory slots
+
+    Each decode takes a free slot, sends the encoded bytes to a worker
+    process and waits for the pixels to land in that slot; the caller then
+    reads them in place, without the decoded frame ever being pickled or
+    copied across processes. Decoding thus runs outside this process's
+    GIL and overlaps with inference on other requests.
+
+    With ``processes=0``, when every slot is in use, when an image does not
+    fit in a slot or when a worker does not answer within ``timeout``
+    seconds, the image is decoded in the calling thread instead. Worker
+    processes are spawned on first use, so a ring created before a fork
+    works in the child.
+    """
+
+    def __init__(self, processes=0, slots=4, slot_bytes=24 * 1024 * 1024, timeout=10.0):
+        self.processes = max(0, int(processes))
+        self.slots = max(1, int(slots))
+        self.slot_bytes = int(slot_bytes)
+        self.timeout = timeout
+        self._free = queue.Queue()
+        for slot in range(self.slots):
+            self._free.put(slot)
+        self._pending = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._started = False
+        self._shm = None
+        self._tasks = None
+        self._results = None
+        self._workers = []
+        self._dead_logged = False
+        self._decoded = registry.counter('decode_images_total', 'Images decoded, by where they were decoded')
+        registry.gauge('decode_ring_free_slots', 'Shared memory frame slots free for decoding').track(self._free.qsize)
+
+    @property
+    def enabled(self):
+        return self.processes > 0
+
+    def decode(self, buffer, max_side=None):
+        """Decode an encoded image, shrinking large JPEGs to max_side as decode_image does"""
+        if self.enabled and self._ensure_started():
+            try:
+                slot = self._free.get_nowait()
+            except queue.Empty:
+                slot = None
+            if slot is not None:
+                decoded = self._decode_in_worker(slot, buffer, max_side)
+                if decoded is not None:
+                    self._decoded.inc(path='worker')
+                    return decoded
+
+        self._decoded.inc(path='inline')
+        image, original_size = decode_image(buffer, max_side)
+        return DecodedImage(image, original_size)
+
+    def _decode_in_worker(self, slot, buffer, max_side):
+        """Decode into slot, or None to fall back to decoding inline"""
+        pending = _PendingDecode(slot)
+        request_id = next(self._ids)
+        with self._lock:
+            self._pending[request_id] = pending
+        self._tasks.put((request_id, slot, bytes(buffer), max_side))
+
+        if not pending.done.wait(self.timeout):
+            with self._lock:
+                if not pending.done.is_set():
+                    # The slot goes back to the ring once the late reply arrives
+                    pending.abandoned = True
+                    logger.warning(f"Decode worker did not answer within {self.timeout}s, decoding inline")
+                    return None
+
+        if pending.error is not None:
+            self._free.put(slot)
+            if pending.error == 'invalid':
+                return DecodedImage(None, None)
+            if pending.error != 'too_large':
+                logger.warning(f"Decode worker error: {pending.error}")
+            return None
+
+        image = np.ndarray(pending.shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * self.slot_bytes)
+        return DecodedImage(image, pending.original_size, release=lambda: self._free.put(slot))
+
+    def _ensure_started(self):
+        """Start the workers if needed; False once none of them is running"""
+        if not self._started:
+            self._start()
+            if not self.enabled:
+                return False
+        if any(worker.is_alive() for worker in self._workers):
+            return True
+        if not self._dead_logged:
+            self._dead_logged = True
+            logger.error("❌ All decode worker processes exited, decoding inline")
+        return False
+
+    def _start(self):
+        with self._start_lock:
+            if self._started:
+                return
+            # Spawned workers start clean instead of inheriting this process's threads
+            context = multiprocessing.get_context('spawn')
+            self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+            self._tasks = context.Queue()
+            self._results = context.Queue()
+            self._workers = [
+                context.Process(
+                    target=_decode_worker, name=f'decode-{i}', daemon=True,
+                    args=(self._shm.name, self.slot_bytes, self._tasks, self._results)
+                )
+                for i in range(self.processes)
+            ]
+            self._started = True
+            atexit.register(self.close)
+            # A spawned child re-runs the parent's __main__ first, which under the
+            # dev server is app.py, importing MediaPipe and building the detector
+            # pool; workers only need this
+            # module, so a bare __main__ stands in while they are started
+            main = sys.modules['__main__']
+            sys.modules['__main__'] = types.ModuleType('__main__')
+            try:
+                for worker in self._workers:
+                    worker.start()
+            except Exception as e:
+                logger.error(f"❌ Could not start decode workers, decoding inline: {e}")
+                self.close()
+                self.processes = 0
+                return
+            finally:
+                sys.modules['__main__'] = main
+            threading.Thread(target=self._dispatch, name='decode-results', daemon=True).start()
+            logger.info(
+                f"✅ Decode ring ready with {self.processes} processes and {self.slots} slots "
+                f"of {self.slot_bytes // (1024 * 1024)}MB"
+            )
+
+    def _dispatch(self):
+        """Hand each worker reply to the thread waiting for it"""
+        while True:
+            try:
+                reply = self._results.get()
+            except (EOFError, OSError):
+                return
+            if reply is None:
+                return
+            request_id, shape, original_size, error = reply
+            with self._lock:
+                pending = self._pending.pop(request_id, None)
+                if pending is None:
+                    continue
+                pending.shape, pending.original_size, pending.error = shape, original_size, error
+                pending.done.set()
+                if pending.abandoned:
+                    self._free.put(pending.slot)
+
+    def close(self):
+        """Stop the worker processes and free the shared memory"""
+        if not self._started:
+            return
+        self._started = False
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            if worker.pid is None:
+                continue
+            worker.join(timeout=2)
+            if worker.is_alive():
+                worker.terminate()
+        # Tasks no worker will read must not block interpreter exit
+        self._tasks.cancel_join_thread()
+        self._results.put(None)
+        try:
+            self._shm.close()
+        except BufferError:
+            # A frame view is still alive; the mapping goes away with the process
+            pass
+        self._shm.unlink()
@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+from backends import (
+    CLASS_OFFSET, DEFAULT_OBJECT_OPTIONS, Detections, ExportedModelBackend, LETTERBOX_COLOR, ObjectOptions,
+    letterbox, nms, postprocess, scale_detections
+)
+
+
+def make_prediction(anchors, num_classes=3):
+    """Raw YOLOv8 output (4 + classes, anchors) from (cx, cy, w, h, class, score) rows"""
+    prediction = np.zeros((4 + num_classes, len(anchors)), np.float32)
+    for i, (cx, cy, w, h, class_id, score) in enumerate(anchors):
+        prediction[:4, i] = (cx, cy, w, h)
+        prediction[4 + class_id, i] = score
+    return prediction
+
+
+def test_letterbox_pads_to_size_and_keeps_aspect_ratio():
+    image = np.full((360, 1280, 3), 7, np.uint8)
+    padded, gain, (left, top) = letterbox(image, (640, 640))
+
+    assert padded.shape == (640, 640, 3)
+    assert gain == pytest.approx(0.5)
+    assert (left, top) == (0, 230)
+    assert (padded[:top] == LETTERBOX_COLOR).all()
+    assert (padded[top:top + 180] == 7).all()
+    assert (padded[top + 180:] == LETTERBOX_COLOR).all()
+
+
+def test_letterbox_auto_pads_only_to_stride():
+    padded, gain, (left, top) = letterbox(np.zeros((300, 640, 3), np.uint8), (640, 640), auto=True)
+
+    assert gain == 1.0
+    assert padded.shape == (320, 640, 3)
+    assert (left, top) == (0, 10)
+
+
+def test_nms_keeps_best_of_overlapping_boxes_best_first():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60]], np.float32)
+    scores = np.array([0.6, 0.9, 0.7], np.float32)
+
+    assert nms(boxes, scores, 0.5).tolist() == [1, 2]
+    # Below the IoU threshold nothing is suppressed
+    assert nms(boxes, scores, 0.9).tolist() == [1, 2, 0]
+
+
+def test_nms_of_no_boxes():
+    assert nms(np.zeros((0, 4), np.float32), np.zeros(0, np.float32), 0.5).size == 0
+
+
+def test_postprocess_converts_centres_and_filters_confidence():
+    detections = postprocess(make_prediction([(50, 40, 20, 10, 1, 0.8), (200, 200, 10, 10, 0, 0.2)]))
+
+    assert detections.xyxy.tolist() == [[40, 35, 60, 45]]
+    assert detections.conf.tolist() == pytest.approx([0.8])
+    assert detections.cls.tolist() == [1]
+    assert detections.cls.dtype == np.int64
+
+
+def test_postprocess_suppresses_within_a_class_only():
+    detections = postprocess(make_prediction([
+        (50, 50, 20, 20, 0, 0.9),
+        (51, 51, 20, 20, 0, 0.8),
+        (51, 51, 20, 20, 2, 0.7)
+    ]))
+
+    assert detections.cls.tolist() == [0, 2]
+    assert detections.conf.tolist() == pytest.approx([0.9, 0.7])
+
+
+def test_postprocess_options():
+    prediction = make_prediction([(20 * i + 10, 10, 10, 10, i % 3, 0.3 + 0.1 * i) for i in range(6)])
+
+    assert len(postprocess(prediction, max_detections=2).conf) == 2
+    assert postprocess(prediction, conf_threshold=0.65).conf.tolist() == pytest.approx([0.8, 0.7])
+    assert set(postprocess(prediction, classes=(1,)).cls.tolist()) == {1}
+    assert len(postprocess(prediction, conf_threshold=0.95).conf) == 0
+    assert len(postprocess(prediction, classes=(5,)).conf) == 0
+
+
+def test_class_offset_separates_boxes_anywhere_in_the_input():
+    # Boxes of neighbouring classes must not overlap once offset, whatever their size
+    assert CLASS_OFFSET >= 2 * 640
+
+
+def test_scale_detections_inverts_letterbox_and_clips():
+    image = np.zeros((360, 1280, 3), np.uint8)
+    _, gain, pad = letterbox(image, (640, 640))
+    letterboxed = Detections(
+        np.array([[100, 250, 200, 330], [600, 240, 660, 500]], np.float32),
+        np.array([0.9, 0.8], np.float32), np.array([0, 1], np.int64)
+    )
+
+    scaled = scale_detections(letterboxed, gain, pad, image.shape)
+
+    assert scaled.xyxy[0].tolist() == pytest.approx([200, 40, 400, 200])
+    assert scaled.xyxy[1].tolist() == pytest.approx([1200, 20, 1280, 360])
+    assert scaled.conf is letterboxed.conf
+
+
+class FakeExportedBackend(ExportedModelBackend):
+    """Returns one box at the same letterboxed position for every image"""
+
+    input_shape = ('batch', 3, 'height', 'width')
+    names = {0: 'person', 1: 'car'}
+
+    def __init__(self):
+        self.batches = []
+
+    def _infer(self, batch):
+        self.batches.append(batch.shape)
+        prediction = make_prediction([(320, 320, 64, 64, 1, 0.9), (100, 100, 10, 10, 0, 0.4)], num_classes=2)
+        return np.repeat(prediction[None], len(batch), axis=0)
+
+
+def test_exported_backend_predict_runs_one_batch_in_original_coordinates():
+    backend = FakeExportedBackend()
+    images = [np.zeros((640, 640, 3), np.uint8), np.zeros((640, 640, 3), np.uint8)]
+
+    results = backend.predict(images)
+
+    assert backend.batches == [(2, 3, 640, 640)]
+    assert [r.cls.tolist() for r in results] == [[1, 0], [1, 0]]
+    assert results[0].xyxy[0].tolist() == pytest.approx([288, 288, 352, 352])
+
+
+def test_exported_backend_predict_applies_object_options():
+    backend = FakeExportedBackend()
+    image = np.zeros((640, 640, 3), np.uint8)
+
+    assert backend.predict([image], ObjectOptions(0.5, 0.7, 300, None))[0].cls.tolist() == [1]
+    assert backend.predict([image], DEFAULT_OBJECT_OPTIONS._replace(classes=(0,)))[0].cls.tolist() == [0]
+    assert backend.predict([]) == []
+
+
+def test_exported_backend_pads_like_pytorch_only_for_dynamic_graphs():
+    tall = np.zeros((640, 300, 3), np.uint8)
+
+    dynamic = FakeExportedBackend()
+    dynamic.predict([tall])
+    dynamic.predict([tall, np.zeros((300, 640, 3), np.uint8)])
+    assert dynamic.batches == [(1, 3, 640, 320), (2, 3, 640, 640)]
+
+    fixed = FakeExportedBackend()
+    fixed.input_shape = (1, 3, 640, 640)
+    fixed.predict([tall])
+    assert fixed.batches == [(1, 3, 640, 640)]
@@ -0,0 +1,90 @@
+import io
+import tarfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.test import EnvironBuilder
+
+from batch import iter_batch_inputs, stream_completed
+
+
+def zip_bytes(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def tar_bytes(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+ARCHIVE = {'a.jpg': b'A', 'nested/b.PNG': b'B', 'notes.txt': b'skip', '__MACOSX/._a.jpg': b'skip'}
+
+
+def test_raw_archive_bodies_yield_only_images():
+    zipped = EnvironBuilder(method='POST', data=zip_bytes(ARCHIVE), content_type='application/zip').get_request()
+    tarred = EnvironBuilder(method='POST', data=tar_bytes(ARCHIVE), content_type='application/gzip').get_request()
+
+    assert list(iter_batch_inputs(zipped)) == [('a.jpg', b'A'), ('nested/b.PNG', b'B')]
+    assert list(iter_batch_inputs(tarred)) == [('a.jpg', b'A'), ('nested/b.PNG', b'B')]
+
+
+def test_multipart_uploads_mix_images_and_archives():
+    request = EnvironBuilder(method='POST', data={
+        'files': [
+            (io.BytesIO(b'C'), 'c.jpg'),
+            (io.BytesIO(zip_bytes({'d.jpg': b'D'})), 'more.ZIP'),
+            (io.BytesIO(tar_bytes({'e.png': b'E'})), 'more.tar.gz')
+        ]
+    }).get_request()
+
+    assert list(iter_batch_inputs(request)) == [('c.jpg', b'C'), ('d.jpg', b'D'), ('e.png', b'E')]
+
+
+def test_stream_completed_pulls_inputs_only_as_fast_as_they_finish():
+    pulled = []
+
+    def items():
+        for i in range(6):
+            pulled.append(i)
+            yield i
+
+    release = threading.Event()
+
+    def process(index, item):
+        release.wait(5)
+        return index, item * 10
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = stream_completed(executor, items(), process, max_in_flight=2)
+        first_pull = threading.Thread(target=lambda: next(results))
+        first_pull.start()
+        first_pull.join(0.1)
+        assert pulled == [0, 1]
+
+        release.set()
+        first_pull.join(5)
+        assert len(list(results)) == 5
+    assert pulled == list(range(6))
+
+
+def test_images_over_the_size_limit_are_yielded_without_their_bytes():
+    files = {'small.jpg': b'S' * 10, 'large.jpg': b'L' * 11}
+    zipped = EnvironBuilder(method='POST', data=zip_bytes(files), content_type='application/zip').get_request()
+    tarred = EnvironBuilder(method='POST', data=tar_bytes(files), content_type='application/gzip').get_request()
+    uploaded = EnvironBuilder(method='POST', data={
+        'files': [(io.BytesIO(data), name) for name, data in files.items()]
+    }).get_request()
+
+    for request in (zipped, tarred, uploaded):
+        assert list(iter_batch_inputs(request, max_bytes=10)) == [('small.jpg', b'S' * 10), ('large.jpg', None)]
+
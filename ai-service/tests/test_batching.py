@@ -0,0 +1,72 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from batching import MicroBatcher
+
+
+class RecordingModel:
+    """Doubles every item and records the batches it was called with"""
+
+    def __init__(self, started=None, release=None):
+        self.batches = []
+        self.started = started
+        self.release = release
+
+    def __call__(self, items, key):
+        if self.started is not None:
+            self.started.set()
+            self.release.wait(5)
+        self.batches.append((list(items), key))
+        return [item * 2 for item in items]
+
+
+def test_submit_runs_a_single_item():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=4, max_wait_ms=0, name='test_single')
+
+    assert batcher.submit(3) == 6
+    assert model.batches == [([3], None)]
+
+
+def test_concurrent_items_share_one_call_per_key_and_keep_their_order():
+    started, release = threading.Event(), threading.Event()
+    model = RecordingModel(started, release)
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=50, name='test_keys')
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        # The first call holds the worker while the rest queue up behind it
+        first = executor.submit(batcher.submit, 0, 'a')
+        assert started.wait(5)
+        futures = [executor.submit(batcher.submit, i, key) for i, key in [(1, 'a'), (2, 'b'), (3, 'a'), (4, 'b')]]
+        while batcher.qsize() < 4:
+            time.sleep(0.005)
+        release.set()
+
+        assert first.result(5) == 0
+        assert [future.result(5) for future in futures] == [2, 4, 6, 8]
+
+    assert model.batches == [([0], 'a'), ([1, 3], 'a'), ([2, 4], 'b')]
+
+
+def test_submit_many_respects_the_batch_size():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=2, max_wait_ms=50, name='test_size')
+
+    assert batcher.submit_many([1, 2, 3, 4, 5]) == [2, 4, 6, 8, 10]
+    assert [len(items) for items, _ in model.batches] == [2, 2, 1]
+
+
+def test_errors_reach_every_caller_of_the_batch():
+    def broken(items, key):
+        return items[:1]
+
+    batcher = MicroBatcher(broken, max_batch_size=4, max_wait_ms=50, name='test_errors')
+
+    with pytest.raises(RuntimeError, match='returned 1 results for 2 inputs'):
+        batcher.submit_many([1, 2])
+    # The worker survives a failed batch
+    batcher.run_batch = lambda items, key: items
+    assert batcher.submit(7) == 7
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from cache import ResultCache, image_cache_key
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_image_cache_key_depends_on_pixels_and_settings():
+    image = np.zeros((4, 4, 3), np.uint8)
+    changed = image.copy()
+    changed[0, 0, 0] = 1
+
+    key = image_cache_key(image, 'both', 'full')
+    assert key == image_cache_key(image.copy(), 'both', 'full')
+    assert key != image_cache_key(changed, 'both', 'full')
+    assert key != image_cache_key(image, 'faces', 'full')
+    assert image_cache_key(image[:, ::-1], 'both') == image_cache_key(image[:, ::-1].copy(), 'both')
+
+
+def test_memory_tier_returns_copies_and_evicts_least_recently_used():
+    cache = ResultCache(max_bytes=30)
+    cache.put('a', {'faces': [1]})
+    cache.put('b', {'faces': [2]})
+
+    cache.get('a')['faces'].append(99)
+    assert cache.get('a') == {'faces': [1]}
+
+    cache.put('c', {'faces': [3]})
+    assert cache.get('b') is None
+    assert cache.get('a') == {'faces': [1]}
+    assert cache.get('c') == {'faces': [3]}
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    ResultCache(max_bytes=0, disk_dir=str(tmp_path)).put('ab12', {'objects': ['car']})
+
+    assert ResultCache(max_bytes=1024, disk_dir=str(tmp_path)).get('ab12') == {'objects': ['car']}
+    assert ResultCache(max_bytes=0, disk_dir=str(tmp_path)).get('cd34') is None
+
+
+def test_disk_tier_is_pruned_off_the_writing_thread(tmp_path, monkeypatch):
+    cache = ResultCache(max_bytes=0, disk_dir=str(tmp_path), disk_max_entries=50)
+    prune = cache._prune_disk
+    prune_threads = []
+
+    def recording_prune():
+        prune_threads.append(threading.current_thread().name)
+        prune()
+
+    monkeypatch.setattr(cache, '_prune_disk', recording_prune)
+    for i in range(100):
+        cache.put(f'{i:04x}', {'index': i})
+
+    assert wait_for(lambda: prune_threads and not cache._pruner.is_alive())
+    assert prune_threads == ['result-cache-prune']
+    files = [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith('.json')]
+    assert len(files) == 50
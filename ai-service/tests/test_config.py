@@ -0,0 +1,22 @@
+from config import env_bool, env_float, env_int, parse_bool
+
+
+def test_parse_bool_accepts_form_and_json_values():
+    assert parse_bool(True) is True
+    assert parse_bool('Yes') is True
+    assert parse_bool(' on ') is True
+    assert parse_bool('0') is False
+    assert parse_bool('false', default=True) is False
+    assert parse_bool(None, default=True) is True
+    assert parse_bool('', default=True) is True
+
+
+def test_env_settings_fall_back_to_defaults(monkeypatch):
+    monkeypatch.setenv('TEST_INT', '12')
+    monkeypatch.setenv('TEST_FLOAT', 'fast')
+    monkeypatch.setenv('TEST_BOOL', ' ')
+
+    assert env_int('TEST_INT', 3) == 12
+    assert env_int('TEST_MISSING', 3) == 3
+    assert env_float('TEST_FLOAT', 1.5) == 1.5
+    assert env_bool('TEST_BOOL', True) is True
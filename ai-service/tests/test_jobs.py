@@ -0,0 +1,216 @@
+import ipaddress
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import jobs
+from jobs import JobQueue, JobQueueFull, resolve_callback
+
+
+def wait_finished(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.finished:
+        assert time.monotonic() < deadline, f"job still {job.status}"
+        time.sleep(0.005)
+
+
+class GatedHandler:
+    """Records payloads in run order; the first job blocks until released"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.payloads = []
+
+    def __call__(self, payload):
+        if not self.payloads:
+            self.started.set()
+            self.release.wait(5)
+        self.payloads.append(payload)
+        if payload == 'bad':
+            raise ValueError('cannot decode')
+        return {'payload': payload}
+
+
+def test_jobs_run_by_priority_then_submission_order():
+    handler = GatedHandler()
+    job_queue = JobQueue(handler, workers=1)
+    first = job_queue.submit('first', 'bulk')
+    assert handler.started.wait(5)
+
+    submitted = [
+        job_queue.submit('bulk', 'bulk'),
+        job_queue.submit('interactive-1'),
+        job_queue.submit('realtime', 'realtime'),
+        job_queue.submit('interactive-2')
+    ]
+    handler.release.set()
+    for job in submitted:
+        wait_finished(job)
+
+    assert handler.payloads == ['first', 'realtime', 'interactive-1', 'interactive-2', 'bulk']
+    assert first.to_dict()['results'] == {'payload': 'first'}
+    assert first.status == 'completed'
+
+
+def test_failed_job_reports_its_error():
+    handler = GatedHandler()
+    handler.release.set()
+    job = JobQueue(handler).submit('bad')
+
+    wait_finished(job)
+    assert job.status == 'failed'
+    assert job.to_dict()['error'] == 'cannot decode'
+
+
+def test_cancelled_queued_job_never_runs():
+    handler = GatedHandler()
+    job_queue = JobQueue(handler, workers=1)
+    running = job_queue.submit('running')
+    assert handler.started.wait(5)
+    queued = job_queue.submit('queued')
+
+    assert job_queue.cancel(queued.id) == (queued, True)
+    assert job_queue.cancel(queued.id) == (queued, False)
+    assert job_queue.cancel('unknown') == (None, False)
+
+    handler.release.set()
+    wait_finished(running)
+    assert handler.payloads == ['running']
+    assert queued.status == 'cancelled'
+
+
+def test_cancelled_running_job_discards_its_results():
+    handler = GatedHandler()
+    job_queue = JobQueue(handler, workers=1)
+    job = job_queue.submit('running')
+    assert handler.started.wait(5)
+
+    assert job_queue.cancel(job.id) == (job, True)
+    handler.release.set()
+    while handler.payloads != ['running']:
+        time.sleep(0.005)
+
+    assert job.status == 'cancelled'
+    assert job.results is None
+
+
+def test_full_queue_rejects_new_jobs():
+    handler = GatedHandler()
+    job_queue = JobQueue(handler, workers=1, max_queued=1)
+    job_queue.submit('running')
+    assert handler.started.wait(5)
+    job_queue.submit('waiting')
+
+    with pytest.raises(JobQueueFull):
+        job_queue.submit('rejected')
+    with pytest.raises(ValueError):
+        job_queue.submit('urgent', priority='urgent')
+    handler.release.set()
+
+
+def test_finished_jobs_expire_after_the_result_ttl():
+    handler = GatedHandler()
+    handler.release.set()
+    job_queue = JobQueue(handler, result_ttl=0.05)
+    job = job_queue.submit('done')
+    wait_finished(job)
+
+    assert job_queue.get(job.id) is job
+    time.sleep(0.1)
+    assert job_queue.get(job.id) is None
+
+
+@pytest.fixture
+def resolve(monkeypatch):
+    """Resolve every host name to the given addresses; IP literals resolve as usual"""
+    addresses = []
+    real_getaddrinfo = socket.getaddrinfo
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        try:
+            ipaddress.ip_address(host)
+            return real_getaddrinfo(host, port, *args, **kwargs)
+        except ValueError:
+            pass
+        return [
+            (socket.AF_INET6 if ':' in address else socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, port or 0))
+            for address in addresses
+        ]
+
+    monkeypatch.setattr(jobs.socket, 'getaddrinfo', getaddrinfo)
+    return addresses
+
+
+@pytest.mark.parametrize('address', ['127.0.0.1', '10.0.0.5', '169.254.169.254', '::1', 'fe80::1%eth0'])
+def test_callbacks_to_internal_addresses_are_refused(resolve, address):
+    resolve.append(address)
+    assert resolve_callback('http://hooks.example.com/done') is None
+
+
+def test_callbacks_need_every_address_public_and_an_http_scheme(resolve):
+    resolve.append('93.184.216.34')
+    assert resolve_callback('https://hooks.example.com/done') == '93.184.216.34'
+    assert resolve_callback('ftp://hooks.example.com/done') is None
+    assert resolve_callback('/done') is None
+
+    resolve.append('192.168.1.10')
+    assert resolve_callback('https://hooks.example.com/done') is None
+
+
+def test_allowed_callback_hosts_replace_the_address_check(resolve):
+    resolve.append('127.0.0.1')
+    assert resolve_callback('http://LOCALHOST:9000/hook', frozenset({'localhost'})) == '127.0.0.1'
+    assert resolve_callback('http://other.example.com/hook', frozenset({'localhost'})) is None
+
+
+def test_disallowed_callback_is_refused_at_submission(resolve):
+    resolve.append('10.0.0.5')
+    job_queue = JobQueue(GatedHandler())
+
+    with pytest.raises(ValueError):
+        job_queue.submit('done', callback_url='http://hooks.example.com/done')
+
+
+@pytest.fixture
+def callback_server():
+    """Local HTTP server recording (Host header, JSON body) of each POST"""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            received.append((self.headers['Host'], json.loads(body)))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1], received
+    server.shutdown()
+    server.server_close()
+
+
+def test_callback_goes_to_the_address_checked_at_submission(resolve, callback_server):
+    port, received = callback_server
+    handler = GatedHandler()
+    job_queue = JobQueue(handler, callback_hosts=frozenset({'hooks.example.com'}))
+
+    resolve.append('127.0.0.1')
+    job = job_queue.submit('done', callback_url=f'http://hooks.example.com:{port}/done')
+    # The host now resolves elsewhere; the callback must not follow it
+    resolve[:] = ['10.0.0.5']
+    handler.release.set()
+    deadline = time.monotonic() + 5
+    while not received and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+    assert received == [(f'hooks.example.com:{port}', job.to_dict())]
+    assert job.callback_error is None
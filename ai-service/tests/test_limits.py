@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+from limits import Overloaded, RequestLimiter
+from metrics import MetricsRegistry
+from pool import PoolExhausted
+
+
+def test_requests_beyond_the_queue_are_shed_at_once():
+    limiter = RequestLimiter(max_active=1, max_queued=0)
+    limiter.acquire()
+
+    started = time.monotonic()
+    with pytest.raises(Overloaded):
+        limiter.acquire()
+    assert time.monotonic() - started < 1.0
+
+
+def test_queued_request_times_out_as_an_exhausted_pool():
+    limiter = RequestLimiter(max_active=1, max_queued=1, queue_timeout=0.01)
+    limiter.acquire()
+
+    with pytest.raises(PoolExhausted):
+        limiter.acquire()
+    assert limiter._queued == 0
+
+
+def test_queued_request_takes_the_released_slot():
+    limiter = RequestLimiter(max_active=1, max_queued=1, queue_timeout=5)
+    limiter.acquire()
+    admitted = threading.Event()
+
+    def queued():
+        limiter.acquire()
+        admitted.set()
+
+    waiter = threading.Thread(target=queued)
+    waiter.start()
+    while limiter._queued == 0:
+        time.sleep(0.005)
+    assert not admitted.is_set()
+
+    limiter.release()
+    waiter.join(5)
+    assert admitted.is_set()
+    assert limiter._active == 1
+
+
+def test_limiter_is_disabled_without_active_slots():
+    assert not RequestLimiter().enabled
+    assert RequestLimiter(max_active=4).enabled
+
+
+def test_constant_labels_tell_worker_series_apart():
+    metrics = MetricsRegistry()
+    metrics.counter('requests_shed_total', 'Shed requests').inc(reason='timeout')
+    metrics.set_constant_labels(worker='4242')
+
+    assert 'requests_shed_total{reason="timeout",worker="4242"} 1' in metrics.prometheus()
@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+
+from motion import MotionGate, shift_results
+
+KEY = ('both', 'full', None)
+
+
+def scene(shift=0):
+    """A textured 320x240 frame, optionally panned right by shift pixels"""
+    rng = np.random.default_rng(0)
+    texture = cv2.GaussianBlur(rng.integers(0, 255, (240, 480, 3), dtype=np.uint8), (0, 0), 4)
+    texture = cv2.normalize(texture, None, 0, 255, cv2.NORM_MINMAX)
+    return np.ascontiguousarray(texture[:, 80 - shift:400 - shift])
+
+
+def results(x=10):
+    return {
+        'faces': [{'boundingBox': {'x': x, 'y': 20, 'width': 30, 'height': 30}, 'landmarks': [{'x': x + 5, 'y': 25}]}],
+        'bodyParts': [],
+        'objects': []
+    }
+
+
+def test_shift_results_moves_boxes_and_points_on_a_copy():
+    original = results()
+    moved = shift_results(original, 2.6, -1)
+
+    assert moved['faces'][0]['boundingBox'] == {'x': 13, 'y': 19, 'width': 30, 'height': 30}
+    assert moved['faces'][0]['landmarks'] == [{'x': 18, 'y': 24}]
+    assert original == results()
+
+
+def test_unchanged_frames_reuse_results_until_the_keyframe():
+    gate = MotionGate(keyframe_interval=2)
+    frame = scene()
+
+    assert gate.reuse(frame, KEY) is None
+    gate.remember(KEY, results())
+    assert gate.reuse(frame.copy(), KEY) == results()
+    assert gate.reuse(frame.copy(), KEY) == results()
+    assert gate.reuse(frame.copy(), KEY) is None
+
+
+def test_changed_frames_and_settings_run_detection():
+    gate = MotionGate()
+    frame = scene()
+    gate.reuse(frame, KEY)
+    gate.remember(KEY, results())
+
+    changed = frame.copy()
+    changed[:120] = 255 - changed[:120]
+    assert gate.reuse(changed, KEY) is None
+    gate.remember(KEY, results())
+    assert gate.reuse(changed, ('faces', 'full', None)) is None
+    assert gate.reuse(cv2.resize(changed, (160, 120)), KEY) is None
+
+
+def test_panning_camera_reuses_shifted_results_with_track_shift():
+    still = MotionGate()
+    tracking = MotionGate(track_shift=True)
+    for gate in (still, tracking):
+        gate.reuse(scene(), KEY)
+        gate.remember(KEY, results())
+
+    assert still.reuse(scene(8), KEY) is None
+    panned = tracking.reuse(scene(8), KEY)
+    assert panned is not None
+    assert abs(panned['faces'][0]['boundingBox']['x'] - 18) <= 2
+
+
+def test_frames_detected_without_the_gate_become_the_reference():
+    gate = MotionGate()
+    first, second = scene(), scene(60)
+    gate.reuse(first, KEY)
+    gate.remember(KEY, results(10))
+
+    # A frame the client sent with the gate turned off
+    gate.remember(KEY, results(70), second)
+
+    assert gate.reuse(second.copy(), KEY) == results(70)
+    assert gate.reuse(first, KEY) is None
@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from pool import DetectorPool, PoolExhausted
+
+
+def test_pool_builds_missing_instances_and_reuses_initial_ones():
+    created = []
+    pool = DetectorPool(lambda: created.append(object()) or created[-1], size=3, initial=['primary'])
+
+    assert pool.instances[0] == 'primary'
+    assert len(created) == 2
+    assert pool.available() == 3
+
+
+def test_checkout_returns_the_instance_even_when_the_request_fails():
+    pool = DetectorPool(object, size=1)
+
+    with pytest.raises(ValueError):
+        with pool.checkout() as instance:
+            assert pool.available() == 0
+            raise ValueError('detection failed')
+
+    assert pool.acquire(timeout=0) is instance
+
+
+def test_exhausted_pool_raises_after_the_timeout():
+    pool = DetectorPool(object, size=1, timeout=0.01)
+    pool.acquire()
+
+    with pytest.raises(PoolExhausted):
+        pool.acquire()
+    assert pool.waiting() == 0
+
+
+def test_waiting_request_gets_the_released_instance():
+    pool = DetectorPool(object, size=1)
+    instance = pool.acquire()
+    received = []
+    waiter = threading.Thread(target=lambda: received.append(pool.acquire(timeout=5)))
+    waiter.start()
+
+    pool.release(instance)
+    waiter.join(5)
+
+    assert received == [instance]
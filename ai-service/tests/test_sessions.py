@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from pool import PoolExhausted
+from sessions import SessionManager
+
+
+class FakeService:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_frames_of_a_session_reuse_its_detector_and_gate():
+    manager = SessionManager(FakeService, gate_factory=object)
+
+    with manager.checkout('cam-1') as first:
+        pass
+    with manager.checkout('cam-1') as second:
+        pass
+    with manager.checkout('cam-2') as other:
+        pass
+
+    assert second is first
+    assert second.frames == 2
+    assert first.gate is not None
+    assert other.service is not first.service
+    assert len(manager) == 2
+
+
+def test_close_releases_the_detector():
+    manager = SessionManager(FakeService)
+    with manager.checkout('cam-1') as session:
+        pass
+
+    assert manager.close('cam-1')
+    assert session.service.closed
+    assert not manager.close('cam-1')
+    assert len(manager) == 0
+
+
+def test_full_manager_evicts_only_idle_sessions():
+    manager = SessionManager(FakeService, idle_timeout=0, max_sessions=1)
+    with manager.checkout('old') as old:
+        pass
+
+    with manager.checkout('new') as new:
+        assert old.closed and old.service.closed
+        assert len(manager) == 1
+    assert new.id == 'new'
+
+
+def test_full_manager_refuses_new_streams_while_all_are_active():
+    manager = SessionManager(FakeService, idle_timeout=60, max_sessions=1)
+    with manager.checkout('active') as active:
+        pass
+
+    with pytest.raises(PoolExhausted):
+        with manager.checkout('new'):
+            pass
+    assert not active.closed
+
+
+def test_session_in_the_middle_of_a_frame_is_not_evicted():
+    manager = SessionManager(FakeService, idle_timeout=0, max_sessions=1)
+    in_frame, done = threading.Event(), threading.Event()
+
+    def stream():
+        with manager.checkout('busy'):
+            in_frame.set()
+            done.wait(5)
+
+    worker = threading.Thread(target=stream)
+    worker.start()
+    assert in_frame.wait(5)
+    try:
+        with pytest.raises(PoolExhausted):
+            with manager.checkout('new'):
+                pass
+    finally:
+        done.set()
+        worker.join(5)
+    assert len(manager) == 1
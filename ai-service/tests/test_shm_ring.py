@@ -0,0 +1,51 @@
+import cv2
+import numpy as np
+import pytest
+
+from frames import decode_image
+from shm_ring import DecodeRing
+
+
+def encoded(width=320, height=240):
+    rng = np.random.default_rng(0)
+    image = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+    return cv2.imencode('.png', image)[1].tobytes()
+
+
+@pytest.fixture
+def worker_ring():
+    ring = DecodeRing(processes=1, slots=2, slot_bytes=320 * 240 * 3, timeout=30)
+    yield ring
+    ring.close()
+
+
+def test_disabled_ring_decodes_inline():
+    ring = DecodeRing(processes=0)
+    buffer = encoded()
+
+    with ring.decode(buffer) as decoded:
+        expected, original_size = decode_image(buffer)
+        assert np.array_equal(decoded.image, expected)
+        assert decoded.original_size == original_size
+    assert decoded.image is None
+    assert not ring._started
+
+
+def test_worker_decodes_into_a_slot_that_is_freed_on_release(worker_ring):
+    buffer = encoded()
+
+    decoded = worker_ring.decode(buffer)
+    assert worker_ring._free.qsize() == 1
+    assert np.array_equal(decoded.image, decode_image(buffer)[0])
+    assert decoded.original_size == (320, 240)
+
+    decoded.release()
+    assert worker_ring._free.qsize() == 2
+
+
+def test_images_the_worker_cannot_place_fall_back_or_report_invalid(worker_ring):
+    with worker_ring.decode(encoded(640, 480)) as large:
+        assert large.image.shape == (480, 640, 3)
+    with worker_ring.decode(b'not an image') as invalid:
+        assert invalid.image is None
+    assert worker_ring._free.qsize() == 2
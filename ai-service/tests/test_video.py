@@ -0,0 +1,20 @@
+import math
+
+from video import frame_stride_for
+
+
+def test_frame_stride_prefers_an_explicit_stride():
+    assert frame_stride_for(30.0, frame_stride=5, target_fps=10) == 5
+    assert frame_stride_for(30.0, target_fps=10) == 3
+    assert frame_stride_for(30.0, target_fps=60) == 1
+    assert frame_stride_for(30.0) == 1
+
+
+def test_frame_stride_ignores_unusable_values():
+    assert frame_stride_for(math.nan, target_fps=10) == 1
+    assert frame_stride_for(30.0, target_fps=math.nan) == 1
+    assert frame_stride_for(30.0, target_fps=math.inf) == 1
+    assert frame_stride_for(math.inf, target_fps=10) == 1
+    assert frame_stride_for(1e308, target_fps=1e-308) == 1
+    assert frame_stride_for(0.0, target_fps=10) == 1
+    assert frame_stride_for(30.0, frame_stride=-2, target_fps=-10) == 1
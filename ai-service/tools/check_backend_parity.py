@@ -0,0 +1,97 @@
+"""Check that an exported object detection backend matches the PyTorch one
+
+Runs the ultralytics backend and a candidate backend over a folder of
+images and pairs their boxes by class and IoU. Exits non-zero when a box
+is missing on either side or differs by more than the tolerances.
+
+    python tools/check_backend_parity.py images/ --backend onnxruntime --model yolov8n.onnx
+"""
+import argparse
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import OBJECT_BACKENDS, create_object_backend  # noqa: E402
+from batch import IMAGE_EXTENSIONS  # noqa: E402
+
+
+def box_iou(a, b):
+    """IoU matrix between two sets of xyxy boxes"""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-7)
+
+
+def compare(reference, candidate, min_confidence, min_iou, max_conf_delta):
+    """List of problems found between two Detections of the same image"""
+    keep_ref = reference.conf > min_confidence
+    keep_cand = candidate.conf > min_confidence
+    ref_boxes, ref_conf, ref_cls = reference.xyxy[keep_ref], reference.conf[keep_ref], reference.cls[keep_ref]
+    cand_boxes, cand_conf, cand_cls = candidate.xyxy[keep_cand], candidate.conf[keep_cand], candidate.cls[keep_cand]
+
+    problems = []
+    iou = box_iou(ref_boxes, cand_boxes) if len(ref_boxes) and len(cand_boxes) else np.zeros((len(ref_boxes), len(cand_boxes)))
+    iou[ref_cls[:, None] != cand_cls[None, :]] = 0
+    matched = set()
+    for i in np.argsort(-ref_conf):
+        j = int(iou[i].argmax()) if iou.shape[1] else -1
+        if j < 0 or iou[i, j] < min_iou or j in matched:
+            problems.append(f"class {ref_cls[i]} box {ref_boxes[i].round(1).tolist()} missing")
+            continue
+        matched.add(j)
+        if abs(ref_conf[i] - cand_conf[j]) > max_conf_delta:
+            problems.append(f"class {ref_cls[i]} confidence {ref_conf[i]:.3f} vs {cand_conf[j]:.3f}")
+    for j in set(range(len(cand_boxes))) - matched:
+        problems.append(f"extra class {cand_cls[j]} box {cand_boxes[j].round(1).tolist()}")
+    return problems, iou.max(axis=1) if iou.size else np.zeros(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('images', help='folder of test images')
+    parser.add_argument('--backend', default='onnxruntime', choices=OBJECT_BACKENDS)
+    parser.add_argument('--model', help='model file of the candidate backend')
+    parser.add_argument('--reference-model', default='yolov8n.pt')
+    parser.add_argument('--min-confidence', type=float, default=0.5, help='only compare boxes the service returns')
+    parser.add_argument('--min-iou', type=float, default=0.9)
+    parser.add_argument('--max-conf-delta', type=float, default=0.02)
+    args = parser.parse_args()
+
+    reference = create_object_backend('ultralytics', args.reference_model)
+    candidate = create_object_backend(args.backend, args.model)
+
+    paths = sorted(
+        os.path.join(args.images, name) for name in os.listdir(args.images)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    failures = 0
+    ious = []
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        problems, image_ious = compare(
+            reference.predict([image])[0], candidate.predict([image])[0],
+            args.min_confidence, args.min_iou, args.max_conf_delta
+        )
+        ious.extend(image_ious.tolist())
+        if problems:
+            failures += 1
+            print(f"MISMATCH {os.path.basename(path)}")
+            for problem in problems:
+                print(f"  {problem}")
+
+    mean_iou = float(np.mean(ious)) if ious else 1.0
+    print(f"{len(paths)} images, {failures} with mismatches, mean matched IoU {mean_iou:.4f}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""Build an INT8 object detection model and report its accuracy and latency
+
+Quantizes an FP32 ONNX export of the YOLO weights with ONNX Runtime static
+quantization, calibrated on a local image folder. The INT8 model is then
+compared against the FP32 one on an evaluation folder: box mAP (using the
+FP32 detections as reference) and p50/p99 latency. With --pose, the lighter
+MediaPipe Pose variants are compared against the heavy model the service
+uses by default the same way (landmark error and latency).
+
+    yolo export model=yolov8n.pt format=onnx
+    python tools/quantize.py calibration_images/ --model yolov8n.onnx --output yolov8n_int8.onnx
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import OnnxRuntimeBackend, letterbox  # noqa: E402
+from batch import IMAGE_EXTENSIONS  # noqa: E402
+from check_backend_parity import box_iou  # noqa: E402
+
+# The YOLOv8 Detect head loses most accuracy when quantized, so it stays FP32
+DEFAULT_EXCLUDE_PREFIXES = ('/model.22/',)
+MAP_IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+LATENCY_WARMUP_RUNS = 3
+
+
+def list_images(folder, limit=None):
+    paths = sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return paths[:limit] if limit else paths
+
+
+class CalibrationReader:
+    """Feeds letterboxed calibration images to the ONNX Runtime quantizer"""
+
+    def __init__(self, paths, input_name, size):
+        self.paths = iter(paths)
+        self.input_name = input_name
+        self.size = size
+
+    def get_next(self):
+        for path in self.paths:
+            image = cv2.imread(path)
+            if image is None:
+                continue
+            padded, _, _ = letterbox(image, self.size)
+            batch = np.ascontiguousarray(padded[None, ..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+            return {self.input_name: batch}
+        return None
+
+    def rewind(self):
+        pass
+
+
+def quantize(model_path, output_path, calibration_paths, exclude_prefixes, per_channel=True):
+    """Write a QDQ INT8 copy of an ONNX model calibrated on the given images"""
+    import onnx
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    with tempfile.TemporaryDirectory() as scratch:
+        prepared_path = os.path.join(scratch, 'prepared.onnx')
+        quant_pre_process(model_path, prepared_path)
+
+        model = onnx.load(prepared_path)
+        model_input = model.graph.input[0]
+        dims = [d.dim_value or 640 for d in model_input.type.tensor_type.shape.dim[2:]]
+        excluded = [
+            node.name for node in model.graph.node
+            if any(node.name.startswith(prefix) for prefix in exclude_prefixes)
+        ]
+
+        quantize_static(
+            prepared_path,
+            output_path,
+            CalibrationReader(calibration_paths, model_input.name, tuple(dims)),
+            quant_format=QuantFormat.QDQ,
+            per_channel=per_channel,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=CalibrationMethod.MinMax,
+            nodes_to_exclude=excluded
+        )
+
+    # Keep the class names, the runtime backend reads them from the metadata
+    source = onnx.load(model_path)
+    quantized = onnx.load(output_path)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(source.metadata_props)
+    onnx.save(quantized, output_path)
+    return len(excluded)
+
+
+def average_precision(recall, precision):
+    """COCO style 101-point interpolated average precision"""
+    precision = np.flip(np.maximum.accumulate(np.flip(precision)))
+    indices = np.searchsorted(recall, np.linspace(0, 1, 101), side='left')
+    interpolated = np.where(indices < len(precision), precision[np.minimum(indices, len(precision) - 1)], 0.0)
+    return float(interpolated.mean())
+
+
+def box_map(references, predictions):
+    """mAP@0.5 and mAP@0.5:0.95 of predictions against reference detections"""
+    # Per IoU threshold, per class: (confidence, is_true_positive) pairs and reference counts
+    matches = [dict() for _ in MAP_IOU_THRESHOLDS]
+    totals = {}
+    for reference, prediction in zip(references, predictions):
+        for class_id in reference.cls.tolist():
+            totals[class_id] = totals.get(class_id, 0) + 1
+        order = np.argsort(-prediction.conf)
+        iou = box_iou(prediction.xyxy[order], reference.xyxy) if len(reference.cls) else np.zeros((len(order), 0))
+        iou[prediction.cls[order][:, None] != reference.cls[None, :]] = 0
+        for t, threshold in enumerate(MAP_IOU_THRESHOLDS):
+            used = np.zeros(len(reference.cls), bool)
+            for row, index in enumerate(order):
+                candidates = np.where((iou[row] >= threshold) & ~used)[0]
+                hit = len(candidates) > 0
+                if hit:
+                    used[candidates[iou[row, candidates].argmax()]] = True
+                class_id = int(prediction.cls[index])
+                matches[t].setdefault(class_id, []).append((float(prediction.conf[index]), hit))
+
+    aps = np.zeros((len(MAP_IOU_THRESHOLDS), len(totals)))
+    for t in range(len(MAP_IOU_THRESHOLDS)):
+        for c, (class_id, total) in enumerate(sorted(totals.items())):
+            pairs = sorted(matches[t].get(class_id, []), key=lambda pair: -pair[0])
+            hits = np.array([hit for _, hit in pairs], dtype=np.float64)
+            if not len(hits):
+                continue
+            true_positives = np.cumsum(hits)
+            recall = true_positives / total
+            precision = true_positives / np.arange(1, len(hits) + 1)
+            aps[t, c] = average_precision(recall, precision)
+    if not totals:
+        return {'map50': 1.0, 'map50_95': 1.0}
+    return {'map50': round(float(aps[0].mean()), 4), 'map50_95': round(float(aps.mean()), 4)}
+
+
+def latency_stats(durations):
+    durations = np.array(durations) * 1000
+    return {
+        'p50Ms': round(float(np.percentile(durations, 50)), 2),
+        'p99Ms': round(float(np.percentile(durations, 99)), 2),
+        'meanMs': round(float(durations.mean()), 2)
+    }
+
+
+def timed_runs(func, images):
+    """Results of func on each image plus the per-image durations"""
+    for image in images[:LATENCY_WARMUP_RUNS]:
+        func(image)
+    results, durations = [], []
+    for image in images:
+        started = time.perf_counter()
+        results.append(func(image))
+        durations.append(time.perf_counter() - started)
+    return results, durations
+
+
+def compare_object_models(fp32_path, int8_path, images, threads):
+    fp32 = OnnxRuntimeBackend(fp32_path, threads)
+    int8 = OnnxRuntimeBackend(int8_path, threads)
+    references, fp32_durations = timed_runs(lambda image: fp32.predict([image])[0], images)
+    predictions, int8_durations = timed_runs(lambda image: int8.predict([image])[0], images)
+    return {
+        'fp32': latency_stats(fp32_durations),
+        'int8': dict(latency_stats(int8_durations), **box_map(references, predictions))
+    }
+
+
+def compare_pose_models(images, complexities=(0, 1), reference_complexity=2):
+    """Landmark error and latency of lighter Pose models against the reference one"""
+    import mediapipe as mp
+
+    def run(complexity):
+        with mp.solutions.pose.Pose(static_image_mode=True, model_complexity=complexity) as pose:
+            def detect(image):
+                result = pose.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+                if not result.pose_landmarks:
+                    return None
+                return np.array([(l.x, l.y) for l in result.pose_landmarks.landmark], dtype=np.float32)
+            return timed_runs(detect, images)
+
+    references, reference_durations = run(reference_complexity)
+    report = {str(reference_complexity): latency_stats(reference_durations)}
+    for complexity in complexities:
+        landmarks, durations = run(complexity)
+        errors = [
+            float(np.linalg.norm(points - reference, axis=1).mean())
+            for points, reference in zip(landmarks, references)
+            if points is not None and reference is not None
+        ]
+        missed = sum(1 for points, reference in zip(landmarks, references) if reference is not None and points is None)
+        report[str(complexity)] = dict(
+            latency_stats(durations),
+            meanLandmarkError=round(float(np.mean(errors)), 4) if errors else None,
+            missedPoses=missed
+        )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('calibration', help='folder of calibration images')
+    parser.add_argument('--model', default='yolov8n.onnx', help='FP32 ONNX model')
+    parser.add_argument('--output', default='yolov8n_int8.onnx')
+    parser.add_argument('--eval', help='folder of evaluation images (defaults to the calibration folder)')
+    parser.add_argument('--max-calibration-images', type=int, default=200)
+    parser.add_argument('--exclude-prefix', action='append', help='node name prefix kept in FP32')
+    parser.add_argument('--per-tensor', action='store_true', help='quantize weights per tensor instead of per channel')
+    parser.add_argument('--threads', type=int, default=0)
+    parser.add_argument('--pose', action='store_true', help='also compare the MediaPipe Pose complexities')
+    parser.add_argument('--report', default='quantization_report.json')
+    args = parser.parse_args()
+
+    calibration_paths = list_images(args.calibration, args.max_calibration_images)
+    if not calibration_paths:
+        parser.error(f"No images found in {args.calibration}")
+    excluded = quantize(
+        args.model, args.output, calibration_paths,
+        args.exclude_prefix or DEFAULT_EXCLUDE_PREFIXES, per_channel=not args.per_tensor
+    )
+    print(f"Wrote {args.output} from {len(calibration_paths)} calibration images ({excluded} nodes kept in FP32)")
+
+    images = [image for image in map(cv2.imread, list_images(args.eval or args.calibration)) if image is not None]
+    report = {
+        'model': args.model,
+        'quantizedModel': args.output,
+        'images': len(images),
+        'objects': compare_object_models(args.model, args.output, images, args.threads)
+    }
+    if args.pose:
+        report['pose'] = compare_pose_models(images)
+
+    with open(args.report, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
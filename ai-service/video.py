@@ -0,0 +1,81 @@
+import math
+
+import cv2
+
+# File extensions treated as video when the upload has no video/* mimetype
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v', '.mpeg', '.mpg')
+
+
+def is_video_upload(file):
+    """Check whether an uploaded file is a video rather than a still image"""
+    if file.mimetype and file.mimetype.startswith('video/'):
+        return True
+    return (file.filename or '').lower().endswith(VIDEO_EXTENSIONS)
+
+
+def _usable(value):
+    return value is not None and math.isfinite(value) and value > 0
+
+
+def frame_stride_for(fps, frame_stride=None, target_fps=None):
+    """Number of source frames to advance per processed frame
+
+    Values that are missing, non-finite or not positive, including an fps
+    the container does not report, are ignored.
+    """
+    if _usable(frame_stride):
+        return max(1, int(frame_stride))
+    if _usable(target_fps) and _usable(fps):
+        ratio = fps / float(target_fps)
+        if math.isfinite(ratio):
+            return max(1, int(round(ratio)))
+    return 1
+
+
+class VideoReader:
+    """Incremental frame reader around cv2.VideoCapture
+
+    Only one decoded frame is held at a time. Frames skipped by the stride
+    are grabbed without being decoded, so memory stays constant and skipped
+    frames cost little regardless of the video length.
+    """
+
+    def __init__(self, path):
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise ValueError("Invalid video file")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        self.width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+        self.height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+
+    def info(self):
+        return {
+            'fps': self.fps,
+            'frameCount': self.frame_count,
+            'width': self.width,
+            'height': self.height
+        }
+
+    def frames(self, stride=1, max_frames=None):
+        """Yield (frame_index, timestamp_ms, bgr_frame) for every stride-th frame"""
+        frame_index = -1
+        yielded = 0
+        while max_frames is None or yielded < max_frames:
+            if not self.capture.grab():
+                break
+            frame_index += 1
+            if frame_index % stride:
+                continue
+            ok, frame = self.capture.retrieve()
+            if not ok:
+                break
+            if self.fps:
+                timestamp = frame_index * 1000.0 / self.fps
+            else:
+                timestamp = self.capture.get(cv2.CAP_PROP_POS_MSEC)
+            yielded += 1
+            yield frame_index, round(timestamp, 1), frame
+
+    def close(self):
+        self.capture.release()